@@ -0,0 +1,232 @@
+"""
+Load test of the WSGI and the ASGI server profiles.
+
+    python -m benchmarks.load --size 100000 --workers 2 --clients 1 10 50
+
+Runs gunicorn with sync workers and uvicorn one after the other, with the
+same number of worker processes, against the database of benchmarks.views
+for that size. Every client requests the tasks list, a task page and the
+labels, statuses and users lists in turn, over a new connection each time.
+Meanwhile --slow clients send their requests byte by byte, the way clients
+on bad networks do. The report shows the throughput, the latency of the
+other clients and the peak memory of all server processes.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.views import DATABASE_URL, get_objects, populate, setup_django
+
+SERVERS = {
+    'wsgi': ['-m', 'gunicorn', '--workers', '{workers}',
+             '--bind', '127.0.0.1:{port}', 'task_manager.wsgi'],
+    'asgi': ['-m', 'uvicorn', 'task_manager.asgi:application',
+             '--workers', '{workers}', '--port', '{port}', '--no-access-log'],
+}
+# Seconds between the bytes of a slow request
+SLOW_DELAY = 0.02
+
+
+def get_paths(objects):
+    from django.urls import reverse
+
+    return [
+        reverse('tasks_list') + f'?executor={objects["executor"]}',
+        reverse('task_info', kwargs={'pk': objects['task']}),
+        reverse('labels_list'),
+        reverse('statuses_list'),
+        reverse('users_list'),
+    ]
+
+
+def get_session(user_id):
+    from django.test import Client
+    from task_manager.apps.users.models import User
+
+    client = Client()
+    client.force_login(User.objects.get(pk=user_id))
+    return client.cookies['sessionid'].value
+
+
+async def fetch(port, path, session, slow=False):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = (f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+               f'Cookie: sessionid={session}\r\n'
+               f'Connection: close\r\n\r\n').encode()
+    try:
+        if slow:
+            for byte in request:
+                writer.write(bytes([byte]))
+                await writer.drain()
+                await asyncio.sleep(SLOW_DELAY)
+        else:
+            writer.write(request)
+            await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+def get_rss(pid):
+    """Resident memory of a process and its children, in kilobytes"""
+    rss = 0
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1])
+        with open(f'/proc/{pid}/task/{pid}/children') as file:
+            children = file.read().split()
+    except FileNotFoundError:
+        return 0
+    return rss + sum(get_rss(child) for child in children)
+
+
+async def wait_for_server(port, paths, session, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await fetch(port, paths[0], session)
+            break
+        except (OSError, IndexError):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f'The server is not up on port {port}')
+            await asyncio.sleep(0.2)
+    # Warm up the caches of every worker
+    for path in paths * 5:
+        await fetch(port, path, session)
+
+
+class LoadTest:
+    def __init__(self, server, args, paths, session):
+        self.server = server
+        self.args = args
+        self.paths = paths
+        self.session = session
+        self.latencies = []
+        self.errors = 0
+        self.peak_rss = 0
+        self.stopped_at = None
+
+    def is_running(self):
+        return time.monotonic() < self.stopped_at
+
+    async def run(self, clients):
+        self.stopped_at = time.monotonic() + self.args.duration
+        await asyncio.gather(
+            self.sample_memory(),
+            *(self.client(number, False) for number in range(clients)),
+            *(self.client(number, True) for number in range(self.args.slow)),
+        )
+        return self.get_results()
+
+    async def client(self, number, slow):
+        while self.is_running():
+            path = self.paths[number % len(self.paths)]
+            number += 1
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(
+                    fetch(self.args.port, path, self.session, slow),
+                    self.args.timeout,
+                )
+            except (OSError, IndexError, asyncio.TimeoutError):
+                status = None
+            if status != 200:
+                self.errors += 1
+            elif not slow:
+                self.latencies.append((time.perf_counter() - started) * 1000)
+
+    async def sample_memory(self):
+        while self.is_running():
+            self.peak_rss = max(self.peak_rss, get_rss(self.server.pid))
+            await asyncio.sleep(0.5)
+
+    def get_results(self):
+        quantiles = [0] * 99
+        if len(self.latencies) > 1:
+            quantiles = statistics.quantiles(self.latencies, n=100)
+        return {
+            'requests_per_s': round(len(self.latencies) / self.args.duration,
+                                    1),
+            'p50_ms': round(quantiles[49], 1),
+            'p95_ms': round(quantiles[94], 1),
+            'p99_ms': round(quantiles[98], 1),
+            'errors': self.errors,
+            'rss_mb': round(self.peak_rss / 1024, 1),
+        }
+
+
+def measure_server(name, args, paths, session):
+    command = [sys.executable] + [
+        part.format(workers=args.workers, port=args.port)
+        for part in SERVERS[name]
+    ]
+    server = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_for_server(args.port, paths, session))
+        results = {}
+        for clients in args.clients:
+            print(f'{name}: {clients} clients, {args.slow} slow',
+                  file=sys.stderr)
+            load_test = LoadTest(server, args, paths, session)
+            results[clients] = asyncio.run(load_test.run(clients))
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(results, slow):
+    print(f'{"server":<8}{"clients":>8}{"slow":>6}{"req/s":>9}{"p50 ms":>9}'
+          f'{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}{"RSS MB":>9}')
+    for name, runs in results.items():
+        for clients, run in runs.items():
+            print(f'{name:<8}{clients:>8}{slow:>6}'
+                  '{requests_per_s:>9}{p50_ms:>9}{p95_ms:>9}{p99_ms:>9}'
+                  '{errors:>8}{rss_mb:>9}'.format(**run))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n\n')[0]
+    )
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    parser.add_argument('--servers', nargs='+', choices=SERVERS,
+                        default=list(SERVERS))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, nargs='+',
+                        default=[1, 10, 50])
+    parser.add_argument('--slow', type=int, default=4,
+                        help='clients sending their requests slowly')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', type=Path,
+                        help='write the report as JSON')
+    args = parser.parse_args()
+
+    database_url = args.database_url.format(size=args.size)
+    setup_django(database_url)
+    populate(args.size)
+    objects = get_objects()
+    paths = get_paths(objects)
+    session = get_session(objects['user'])
+
+    results = {name: measure_server(name, args, paths, session)
+               for name in args.servers}
+    report(results, args.slow)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
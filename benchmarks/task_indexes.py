@@ -0,0 +1,145 @@
+"""
+Query plans and timings of the tasks list filters before and after
+the composite indexes of tasks.0004_task_filter_indexes.
+
+    python -m benchmarks.task_indexes --tasks 1000000
+
+The benchmark uses its own database (bench_indexes.sqlite3 unless
+--database-url is given). The dataset is generated on the first run
+and reused afterwards.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+BEFORE = '0003_task_created_at_id_idx'
+AFTER = '0004_task_filter_indexes'
+PAGE_SIZE = 50
+
+
+def setup_django(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+    import django
+    django.setup()
+
+
+def populate(tasks):
+    from django.core.management import call_command
+    from task_manager.apps.tasks.models import Task
+
+    call_command('migrate', verbosity=0)
+    if not Task.objects.exists():
+        call_command('generate_dataset', tasks=tasks, users=100, statuses=6,
+                     labels=30, labels_per_task=1.5, verbosity=0)
+
+
+def get_cases():
+    from django.db.models import Count
+    from task_manager.apps.tasks.models import Task, TaskLabelRelation
+
+    hot = Task.objects.values('executor', 'status').annotate(
+        total=Count('id')
+    ).order_by('-total').first()
+    author = Task.objects.values_list('author', flat=True).first()
+    label = TaskLabelRelation.objects.values_list('label', flat=True).first()
+    return [
+        ('all tasks', {}, None),
+        ('status', {'status': hot['status']}, None),
+        ('executor', {'executor': hot['executor']}, None),
+        ('executor + status',
+         {'executor': hot['executor'], 'status': hot['status']}, None),
+        ('own tasks + status',
+         {'name': 'on', 'status': hot['status']}, author),
+        ('label', {'labels': label}, None),
+    ]
+
+
+def get_paginator(data, author):
+    from django.test import RequestFactory
+    from task_manager.apps.tasks.filters import TaskFilter
+    from task_manager.apps.tasks.models import Task
+    from task_manager.apps.users.models import User
+    from task_manager.pagination import FORWARD, KeysetPaginator
+
+    request = RequestFactory().get('/tasks/', data)
+    request.user = User.objects.get(pk=author) if author else None
+    queryset = TaskFilter(data, queryset=Task.objects.all(),
+                          request=request).qs
+    paginator = KeysetPaginator(queryset, ('created_at', 'id'), PAGE_SIZE)
+
+    middle = queryset.order_by('created_at', 'id')[queryset.count() // 2:]
+    row = middle.first()
+    deep_cursor = paginator.encode_cursor(FORWARD, row) if row else None
+    return paginator, deep_cursor
+
+
+def measure(paginator, cursor, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        paginator.get_page(cursor)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'plan': paginator.get_page_queryset(cursor).explain(),
+    }
+
+
+def run(repeat):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    results = {}
+    for title, data, author in get_cases():
+        paginator, deep_cursor = get_paginator(data, author)
+        results[title] = {
+            'first page': measure(paginator, None, repeat),
+            'middle page': measure(paginator, deep_cursor, repeat),
+        }
+    return results
+
+
+def report(results):
+    for title in results['after']:
+        for page in ('first page', 'middle page'):
+            before = results['before'][title][page]
+            after = results['after'][title][page]
+            print(f'## {title}, {page}: '
+                  f'{before["median_ms"]} ms -> {after["median_ms"]} ms')
+            print(f'before:\n{before["plan"]}\nafter:\n{after["plan"]}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n\n')[0]
+    )
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url',
+                        default='sqlite:///bench_indexes.sqlite3')
+    parser.add_argument('--output', help='write the results as JSON')
+    args = parser.parse_args()
+
+    setup_django(args.database_url)
+    from django.core.management import call_command
+
+    populate(args.tasks)
+    results = {}
+    for name, migration in (('before', BEFORE), ('after', AFTER)):
+        call_command('migrate', 'tasks', migration, verbosity=0)
+        results[name] = run(args.repeat)
+    call_command('migrate', verbosity=0)
+
+    report(results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Wall time, SQL queries, SQL time and peak memory of every view at
+several dataset sizes, compared against a stored baseline.
+
+    python -m benchmarks.views --sizes 1000 100000 1000000
+
+Every size gets its own database (bench_views_<size>.sqlite3 unless
+--database-url is given, where {size} is replaced by the size), generated
+with the generate_dataset command on the first run and reused afterwards.
+Each size is measured in a separate process. Requests that change data
+run in a transaction which is rolled back.
+
+The report lists the growth of every view between the smallest and the
+largest size: a view whose query count or time grows with the number of
+tasks is a regression waiting to happen. With --baseline, the exit status
+is 1 if any view got more queries or slower than the baseline allows.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASELINE = Path(__file__).with_name('views_baseline.json')
+DATABASE_URL = 'sqlite:///bench_views_{size}.sqlite3'
+SIZES = (1000, 100_000, 1_000_000)
+DATASET = {'users': 1000, 'statuses': 8, 'labels': 200}
+# Timings below this many milliseconds are noise, not regressions
+MIN_SLOWDOWN_MS = 5
+
+
+def setup_django(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+    import django
+    django.setup()
+
+
+def populate(tasks):
+    from django.core.management import call_command
+    from task_manager.apps.tasks.models import Task
+
+    call_command('migrate', verbosity=0)
+    if not Task.objects.exists():
+        # stdout carries the results of the child process
+        call_command('generate_dataset', tasks=tasks, verbosity=0,
+                     stdout=sys.stderr, **DATASET)
+
+
+def get_objects():
+    """The objects the views are measured with, the busiest ones"""
+    from django.db.models import Count
+    from task_manager.apps.tasks.models import Task, TaskLabelRelation
+
+    def busiest(queryset, field):
+        return queryset.values(field).annotate(
+            total=Count('*')
+        ).order_by('-total').values_list(field, flat=True)[0]
+
+    last = Task.objects.order_by('-id').values_list('id', flat=True)[0]
+    task = Task.objects.filter(id__gte=last // 2).order_by('id').first()
+    idle = Task.objects.values('executor').annotate(
+        total=Count('*')
+    ).order_by('total').values_list('executor', flat=True)[0]
+    return {
+        # Logged in as the author of a task in the middle of the table
+        'user': task.author_id,
+        'task': task.pk,
+        'executor': busiest(Task.objects.all(), 'executor'),
+        'idle': idle,
+        'status': busiest(Task.objects.all(), 'status'),
+        'label': busiest(TaskLabelRelation.objects.all(), 'label'),
+    }
+
+
+def get_routes():
+    """(name, has pk) of every named route except the admin site"""
+    from django.urls import URLPattern, get_resolver
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLPattern):
+                if pattern.name:
+                    yield (pattern.name,
+                           'pk' in pattern.pattern.converters)
+            elif pattern.namespace != 'admin':
+                yield from walk(pattern.url_patterns)
+
+    return list(walk(get_resolver().url_patterns))
+
+
+def get_post_data(objects):
+    from task_manager.apps.tasks.models import Task
+
+    task = Task.objects.get(pk=objects['task'])
+    password = {'password1': 'Benchmark-2024', 'password2': 'Benchmark-2024'}
+    user = {'first_name': 'Bench', 'last_name': 'Mark', **password}
+    return {
+        'login': {'username': 'gen-user-0', 'password': 'password'},
+        'logout': {},
+        'user_create': {'username': 'benchmark', **user},
+        'user_update': {'username': 'benchmark', **user},
+        'user_delete': {},
+        'status_create': {'name': 'Benchmark'},
+        'status_update': {'name': 'Benchmark'},
+        'status_delete': {},
+        'label_create': {'name': 'Benchmark'},
+        'label_update': {'name': 'Benchmark'},
+        'label_delete': {},
+        'task_create': {'name': 'Benchmark', 'description': 'Benchmark',
+                        'status': task.status_id,
+                        'executor': task.executor_id,
+                        'labels': [objects['label']]},
+        'task_update': {'name': 'Benchmark', 'description': task.description,
+                        'status': task.status_id,
+                        'executor': task.executor_id,
+                        'labels': [objects['label']]},
+        'task_delete': {},
+    }
+
+
+def get_cases(objects):
+    """(title, method, url, data) of every view"""
+    from django.urls import reverse
+
+    query = {
+        'tasks_list': f'?executor={objects["executor"]}',
+        # A full export is linear by design, measure a small one
+        'tasks_export': f'?format=csv&executor={objects["idle"]}',
+    }
+    post_data = get_post_data(objects)
+    cases = []
+    for name, has_pk in get_routes():
+        model = name.removeprefix('api_').split('_')[0]
+        kwargs = {'pk': objects[model]} if has_pk else {}
+        url = reverse(name, kwargs=kwargs)
+        cases.append((f'GET {name}', 'get', url + query.get(name, ''), None))
+        if name == 'tasks_list':
+            cases.append((f'GET {name} unfiltered', 'get', url, None))
+        if name in post_data:
+            cases.append((f'POST {name}', 'post', url, post_data[name]))
+    return cases
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+
+
+def request(client, method, url, data):
+    from django.db import connection, transaction
+
+    counter = QueryCounter()
+    with transaction.atomic(), connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        response = getattr(client, method)(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return response.status_code, elapsed, counter
+
+
+def measure(case, user, repeat):
+    from django.test import Client
+
+    title, method, url, data = case
+    client = Client(HTTP_HOST='localhost')
+    timings, sql_timings = [], []
+    # The first request warms up caches and is not counted
+    for _ in range(repeat + 1):
+        client.force_login(user)
+        status, elapsed, counter = request(client, method, url, data)
+        timings.append(elapsed * 1000)
+        sql_timings.append(counter.time * 1000)
+
+    client.force_login(user)
+    tracemalloc.start()
+    request(client, method, url, data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'status': status,
+        'wall_ms': round(statistics.median(timings[1:]), 3),
+        'queries': counter.count,
+        'sql_ms': round(statistics.median(sql_timings[1:]), 3),
+        'peak_kb': peak // 1024,
+    }
+
+
+def measure_size(size, repeat):
+    from django.db import connection
+    from task_manager.apps.users.models import User
+
+    populate(size)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    objects = get_objects()
+    user = User.objects.get(pk=objects['user'])
+    return {title: measure((title, *case), user, repeat)
+            for title, *case in get_cases(objects)}
+
+
+def run_size(size, args):
+    """Measure one size in a child process with its own database"""
+    database_url = args.database_url.format(size=size)
+    print(f'Measuring {size} tasks at {database_url}', file=sys.stderr)
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.views', '--child', str(size),
+         '--repeat', str(args.repeat), '--database-url', database_url],
+        check=True, stdout=subprocess.PIPE, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def get_growth(results, sizes):
+    smallest, largest = str(min(sizes)), str(max(sizes))
+    growth = {}
+    for title, small in results[smallest].items():
+        large = results[largest][title]
+        growth[title] = {
+            'queries': large['queries'] - small['queries'],
+            'wall': round(large['wall_ms'] / small['wall_ms'], 2),
+            'sql': round(large['sql_ms'] / max(small['sql_ms'], 0.001), 2),
+        }
+    return growth
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against the baseline, as readable lines"""
+    regressions = []
+    for size, cases in results.items():
+        for title, result in cases.items():
+            expected = baseline.get(size, {}).get(title)
+            if expected is None:
+                continue
+            if result['queries'] > expected['queries']:
+                regressions.append(
+                    f'{title} at {size} tasks: {expected["queries"]} -> '
+                    f'{result["queries"]} queries'
+                )
+            limit = max(expected['wall_ms'] * tolerance,
+                        expected['wall_ms'] + MIN_SLOWDOWN_MS)
+            if result['wall_ms'] > limit:
+                regressions.append(
+                    f'{title} at {size} tasks: {expected["wall_ms"]} -> '
+                    f'{result["wall_ms"]} ms'
+                )
+    return regressions
+
+
+def report(results, growth):
+    sizes = list(results)
+    print(f'{"view":<34}' + ''.join(f'{size:>24}' for size in sizes)
+          + f'{"growth":>22}')
+    for title, change in growth.items():
+        cells = ''.join(
+            '{wall_ms:>9.1f} ms {queries:>3} q {peak_kb:>5} kB'.format(
+                **results[size][title]
+            ) for size in sizes
+        )
+        print(f'{title:<34}{cells}   x{change["wall"]:<6} '
+              f'{change["queries"]:+} queries')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n\n')[0]
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    parser.add_argument('--output', help='write the report as JSON')
+    parser.add_argument('--baseline', type=Path,
+                        help=f'compare against a baseline, e.g. {BASELINE}')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='allowed slowdown against the baseline')
+    parser.add_argument('--save-baseline', type=Path,
+                        help='store the results as the new baseline')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        setup_django(args.database_url)
+        json.dump(measure_size(args.child, args.repeat), sys.stdout)
+        return
+
+    results = {str(size): run_size(size, args) for size in args.sizes}
+    growth = get_growth(results, args.sizes)
+    report(results, growth)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'results': results, 'growth': growth}, file, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        print('\n'.join(regressions) or 'No regressions against the baseline')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
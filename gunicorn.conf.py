@@ -0,0 +1,7 @@
+"""Settings of gunicorn, see make start-wsgi"""
+
+
+def post_worker_init(worker):
+    # Every worker is ready for its first request, see task_manager.warmup
+    from task_manager.warmup import warm_up_server
+    warm_up_server()
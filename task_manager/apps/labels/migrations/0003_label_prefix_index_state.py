@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:13
+
+from django.db import migrations
+import task_manager.indexes
+from task_manager.indexes import drop_prefix_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_label_prefix_index'),
+    ]
+
+    # The raw SQL index of 0002 becomes a PrefixIndex of the model
+    operations = [
+        drop_prefix_indexes('labels_label', ['name']),
+        migrations.AddIndex(
+            model_name='label',
+            index=task_manager.indexes.PrefixIndex('name', name='label_name_prefix_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from task_manager.indexes import PrefixIndex
+
 
 # Create your models here.
 class Label(models.Model):
@@ -14,6 +16,10 @@ class Label(models.Model):
         ordering = ['created_at']
         verbose_name = _('Label')
         verbose_name_plural = _('Labels')
+        indexes = [
+            # Autocomplete of the labels
+            PrefixIndex('name', name='label_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
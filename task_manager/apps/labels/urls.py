@@ -1,10 +1,13 @@
 from django.urls import path
 
 from task_manager.apps.labels.views import (LabelsView, LabelCreateView,
-                                            LabelUpdateView, LabelDeleteView)
+                                            LabelUpdateView, LabelDeleteView,
+                                            LabelAutocompleteView)
 
 urlpatterns = [
     path('', LabelsView.as_view(), name='labels_list'),
+    path('autocomplete/', LabelAutocompleteView.as_view(),
+         name='labels_autocomplete'),
     path('create/', LabelCreateView.as_view(), name='label_create'),
     path('<int:pk>/update/', LabelUpdateView.as_view(), name='label_update'),
     path('<int:pk>/delete/', LabelDeleteView.as_view(), name='label_delete'),
@@ -5,14 +5,29 @@ from django.views.generic import CreateView, UpdateView, DeleteView, ListView
 
 from task_manager.apps.labels.forms import LabelForm
 from task_manager.apps.labels.models import Label
-from task_manager.mixins import AuthenticateMixin, DeleteProtectionMixin
+from task_manager.apps.tasks.models import LabelStat
+from task_manager.apps.tasks.stats import count_tasks
+from task_manager.autocomplete import AutocompleteView
+from task_manager.mixins import (AsyncListMixin, AuthenticateMixin,
+                                 DeleteProtectionMixin)
 
 
-class LabelsView(AuthenticateMixin, ListView):
+class LabelsView(AuthenticateMixin, AsyncListMixin, ListView):
     template_name = 'labels/list.html'
     model = Label
     context_object_name = 'labels'
 
+    def get_queryset(self):
+        return super().get_queryset().annotate(
+            tasks_count=count_tasks(LabelStat.objects.all(), 'label'),
+        )
+
+
+class LabelAutocompleteView(AutocompleteView):
+    model = Label
+    search_fields = ('name',)
+    ordering = ('name',)
+
 
 class LabelCreateView(AuthenticateMixin, SuccessMessageMixin, CreateView):
     template_name = 'labels/create.html'
@@ -5,14 +5,22 @@ from django.views.generic import CreateView, ListView, UpdateView, DeleteView
 
 from task_manager.apps.statuses.forms import StatusForm
 from task_manager.apps.statuses.models import Status
-from task_manager.mixins import AuthenticateMixin, DeleteProtectionMixin
+from task_manager.apps.tasks.models import TaskStat
+from task_manager.apps.tasks.stats import count_tasks
+from task_manager.mixins import (AsyncListMixin, AuthenticateMixin,
+                                 DeleteProtectionMixin)
 
 
-class StatusesView(AuthenticateMixin, ListView):
+class StatusesView(AuthenticateMixin, AsyncListMixin, ListView):
     template_name = 'statuses/list.html'
     model = Status
     context_object_name = 'statuses'
 
+    def get_queryset(self):
+        return super().get_queryset().annotate(
+            tasks_count=count_tasks(TaskStat.objects.all(), 'status'),
+        )
+
 
 class StatusCreateView(AuthenticateMixin, SuccessMessageMixin, CreateView):
     template_name = 'statuses/create.html'
@@ -0,0 +1,201 @@
+"""
+JSON API of tasks.
+
+Tasks are serialized straight from values() rows. ``fields`` selects the
+keys of each task (all of them by default) and ``include=labels`` adds the
+label names, loaded with one query per page. The list accepts the
+TaskFilter parameters and is paginated with cursors. Bulk operations
+take a JSON body, see TaskApiBulkView.
+"""
+import json
+from collections import Counter
+
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.translation import gettext as _
+from django.views.generic import View
+from django_filters.views import FilterMixin
+
+from task_manager.apps.tasks import events
+from task_manager.apps.tasks.bulk import NOT_FOUND, UPDATED
+from task_manager.apps.tasks.export import get_label_names
+from task_manager.apps.tasks.filters import TaskFilter
+from task_manager.apps.tasks.forms import BulkTaskForm
+from task_manager.apps.tasks.models import Task
+from task_manager.apps.tasks.search import get_search_ordering
+from task_manager.apps.tasks.versions import defer_versions, invalidate_version
+from task_manager.mixins import KeysetPaginationMixin
+from task_manager.pagination import InvalidCursor, KeysetPaginator
+
+# API field: values() lookup
+FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'status': 'status__name',
+    'status_id': 'status_id',
+    'author': 'author__username',
+    'author_id': 'author_id',
+    'executor': 'executor__username',
+    'executor_id': 'executor_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+INCLUDES = ('labels',)
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class TaskApiMixin:
+    fields_kwarg = 'fields'
+    include_kwarg = 'include'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': _('You are not logged in! '
+                                            'Please log in.')}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': error.args[0]}, status=error.status)
+
+    def get_list_param(self, name, allowed):
+        values = [value.strip() for value in self.request.GET.get(name, '')
+                  .split(',') if value.strip()]
+        unknown = sorted(set(values) - set(allowed))
+        if unknown:
+            raise ApiError(_('Unknown values of %(name)s: %(values)s') % {
+                'name': name, 'values': ', '.join(unknown)
+            })
+        return values
+
+    def get_fields(self):
+        return self.get_list_param(self.fields_kwarg, FIELDS) or list(FIELDS)
+
+    def get_values(self, queryset, extra=()):
+        """values() rows of the requested fields, plus ``extra`` ones"""
+        fields = self.get_fields()
+        lookups = {FIELDS[field] for field in fields} | {'id', *extra}
+        return queryset.values(*lookups), fields
+
+    def serialize(self, rows, fields):
+        tasks = [{field: row[FIELDS[field]] for field in fields}
+                 for row in rows]
+        if 'labels' in self.get_list_param(self.include_kwarg, INCLUDES):
+            labels = get_label_names([row['id'] for row in rows])
+            for task, row in zip(tasks, rows):
+                task['labels'] = labels[row['id']]
+        return tasks
+
+
+class TaskApiListView(TaskApiMixin, KeysetPaginationMixin, FilterMixin, View):
+    model = Task
+    filterset_class = TaskFilter
+    page_size = 100
+    max_page_size = 5000
+
+    def get_queryset(self):
+        return Task.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        filterset = self.get_filterset(self.get_filterset_class())
+        if filterset.is_bound and not filterset.is_valid():
+            return JsonResponse({'error': filterset.errors}, status=400)
+
+        ordering = get_search_ordering(filterset.qs,
+                                       self.get_keyset_ordering())
+        keys = [field.lstrip('-') for field in ordering]
+        queryset, fields = self.get_values(filterset.qs, extra=keys)
+        paginator = KeysetPaginator(queryset, ordering, self.get_page_size())
+        try:
+            page = paginator.get_page(request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise ApiError(_('Invalid page cursor'))
+
+        return JsonResponse({
+            'results': self.serialize(page.object_list, fields),
+            'next': self.get_page_url(page.next_cursor),
+            'previous': self.get_page_url(page.previous_cursor),
+        })
+
+    def get_page_url(self, cursor):
+        if cursor is None:
+            return None
+        return self.request.build_absolute_uri(
+            f'{self.request.path}?{self.get_page_query(cursor)}'
+        )
+
+
+class TaskApiDetailView(TaskApiMixin, View):
+    def get(self, request, pk, *args, **kwargs):
+        queryset, fields = self.get_values(Task.objects.filter(pk=pk))
+        rows = list(queryset)
+        if not rows:
+            raise ApiError(_('Task not found'), status=404)
+        return JsonResponse(self.serialize(rows, fields)[0])
+
+
+class TaskApiBulkView(TaskApiMixin, View):
+    """
+    Apply an action to the selected tasks in one transaction, e.g.
+    {"action": "set_executor", "executor": 3, "filter": {"executor": 1}}.
+    The response has the result of every selected task.
+    """
+    max_tasks = 10000
+
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            raise ApiError(_('Send the operation as a JSON object'))
+        form = BulkTaskForm(data)
+        if not form.is_valid():
+            return JsonResponse({'error': form.errors}, status=400)
+
+        function, value = form.get_action()
+        with transaction.atomic(), defer_versions():
+            tasks = self.get_tasks(form.cleaned_data)
+            results = function(tasks, value, request.user)
+            invalidate_version(Task)
+            # update() and bulk_create() send no signals, deletes do
+            events.publish_on_commit(
+                events.UPDATED,
+                [pk for pk, result in results.items() if result == UPDATED],
+            )
+
+        for pk in form.cleaned_data['tasks']:
+            results.setdefault(pk, NOT_FOUND)
+        return JsonResponse({
+            'results': [{'id': pk, 'result': result}
+                        for pk, result in results.items()],
+            'counts': Counter(results.values()),
+        })
+
+    def get_tasks(self, cleaned_data):
+        """values() rows of the selected tasks, locked until the commit"""
+        queryset = Task.objects.all()
+        if cleaned_data['filter'] is not None:
+            filterset = TaskFilter(cleaned_data['filter'], queryset=queryset,
+                                   request=self.request)
+            if not filterset.is_valid():
+                raise ApiError(filterset.errors)
+            queryset = filterset.qs
+        if cleaned_data['tasks']:
+            queryset = queryset.filter(pk__in=cleaned_data['tasks'])
+
+        tasks = list(queryset.select_for_update(of=('self',)).order_by(
+            'id'
+        ).values('id', 'author_id', 'executor_id', 'status_id')[
+            :self.max_tasks + 1
+        ])
+        if len(tasks) > self.max_tasks:
+            raise ApiError(_('Select at most %(count)d tasks') % {
+                'count': self.max_tasks
+            })
+        return tasks
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from task_manager.apps.tasks.api import (TaskApiBulkView, TaskApiDetailView,
+                                         TaskApiListView)
+
+urlpatterns = [
+    path('', TaskApiListView.as_view(), name='api_tasks_list'),
+    path('bulk/', TaskApiBulkView.as_view(), name='api_tasks_bulk'),
+    path('<int:pk>/', TaskApiDetailView.as_view(), name='api_task_info'),
+]
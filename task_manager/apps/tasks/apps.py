@@ -4,3 +4,36 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_manager.apps.tasks'
+
+    def ready(self):
+        from django.db.models.signals import (m2m_changed, post_delete,
+                                              post_save)
+
+        from task_manager.apps.labels.models import Label
+        from task_manager.apps.tasks.events import (
+            publish_task_deleted, publish_task_relabeled, publish_task_saved
+        )
+        from task_manager.apps.statuses.models import Status
+        from task_manager.apps.tasks.models import Task
+        from task_manager.apps.tasks.versions import (
+            invalidate_relation_versions, invalidate_version
+        )
+        from task_manager.apps.users.models import User
+
+        for model in (Status, Label, User, Task):
+            for signal in (post_save, post_delete):
+                signal.connect(invalidate_version, sender=model,
+                               dispatch_uid=f'version_{model.__name__}')
+        # Labels decide which tasks the labels filter finds
+        m2m_changed.connect(invalidate_relation_versions,
+                            sender=Task.labels.through,
+                            dispatch_uid='version_TaskLabelRelation')
+
+        # Events of the live tasks list
+        post_save.connect(publish_task_saved, sender=Task,
+                          dispatch_uid='events_task_saved')
+        post_delete.connect(publish_task_deleted, sender=Task,
+                            dispatch_uid='events_task_deleted')
+        m2m_changed.connect(publish_task_relabeled,
+                            sender=Task.labels.through,
+                            dispatch_uid='events_task_relabeled')
@@ -0,0 +1,93 @@
+"""
+Bulk operations on tasks.
+
+Every action gets the selected tasks as values() rows with their id,
+author, executor and status, changes all of them with a few set-based
+statements and returns the result for each task. update() and
+bulk_create() bypass auto_now and the signals, so the actions set
+updated_at themselves and the caller bumps the version of Task.
+"""
+from django.utils import timezone
+
+from task_manager.apps.tasks.models import Task, TaskLabelRelation
+
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+DELETED = 'deleted'
+FORBIDDEN = 'forbidden'
+NOT_FOUND = 'not_found'
+
+BATCH_SIZE = 1000
+
+
+def get_results(tasks, ids, result, otherwise):
+    return {task['id']: result if task['id'] in ids else otherwise
+            for task in tasks}
+
+
+def touch(task_ids, **values):
+    if task_ids:
+        Task.objects.filter(pk__in=task_ids).update(
+            updated_at=timezone.now(), **values
+        )
+
+
+def update_field(tasks, name, value):
+    changed = {task['id'] for task in tasks
+               if task[f'{name}_id'] != value.pk}
+    touch(changed, **{name: value})
+    return get_results(tasks, changed, UPDATED, UNCHANGED)
+
+
+def get_relations(tasks, labels):
+    """(task id, label id) pairs of the tasks already having the labels"""
+    return set(TaskLabelRelation.objects.filter(
+        task__in=[task['id'] for task in tasks], label__in=labels
+    ).values_list('task_id', 'label_id'))
+
+
+def set_status(tasks, status, user):
+    return update_field(tasks, 'status', status)
+
+
+def set_executor(tasks, executor, user):
+    return update_field(tasks, 'executor', executor)
+
+
+def add_labels(tasks, labels, user):
+    existing = get_relations(tasks, labels)
+    relations = [TaskLabelRelation(task_id=task['id'], label=label)
+                 for task in tasks for label in labels
+                 if (task['id'], label.pk) not in existing]
+    TaskLabelRelation.objects.bulk_create(relations, batch_size=BATCH_SIZE)
+    changed = {relation.task_id for relation in relations}
+    touch(changed)
+    return get_results(tasks, changed, UPDATED, UNCHANGED)
+
+
+def remove_labels(tasks, labels, user):
+    existing = get_relations(tasks, labels)
+    changed = {task_id for task_id, label_id in existing}
+    if changed:
+        TaskLabelRelation.objects.filter(task__in=changed,
+                                         label__in=labels).delete()
+    touch(changed)
+    return get_results(tasks, changed, UPDATED, UNCHANGED)
+
+
+def delete_tasks(tasks, value, user):
+    # Only the author of a task can delete it, as in TaskDeleteView
+    own = {task['id'] for task in tasks if task['author_id'] == user.pk}
+    if own:
+        Task.objects.filter(pk__in=own).delete()
+    return get_results(tasks, own, DELETED, FORBIDDEN)
+
+
+# action: (form field of its value, function)
+ACTIONS = {
+    'set_status': ('status', set_status),
+    'set_executor': ('executor', set_executor),
+    'add_labels': ('labels', add_labels),
+    'remove_labels': ('labels', remove_labels),
+    'delete': (None, delete_tasks),
+}
@@ -0,0 +1,69 @@
+"""
+Cached choices of the status, executor and labels fields.
+
+Statuses, labels and users rarely change, so their (pk, label) pairs are
+kept in the cache under the version of their model. Forms and filters
+built with the fields below render without querying the database. The
+choices are read from the primary database: read from a lagging replica,
+they would be cached under the version of a change they miss.
+"""
+from django import forms
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django_filters import fields as filter_fields
+
+from task_manager.apps.tasks.versions import get_version
+
+CHOICES_TIMEOUT = 24 * 3600
+
+
+def get_choices(model):
+    """(pk, label) pairs of all objects of the model, in default order"""
+    version = get_version(model)
+    key = f'choices:{model._meta.label_lower}:{version}'
+    choices = cache.get(key)
+    if choices is None:
+        choices = [(instance.pk, str(instance))
+                   for instance
+                   in model._default_manager.using(DEFAULT_DB_ALIAS)]
+        cache.set(key, choices, CHOICES_TIMEOUT)
+    return choices
+
+
+class CachedModelChoiceIterator(forms.models.ModelChoiceIterator):
+    """Iterates over the cached choices of the whole model"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield '', self.field.empty_label
+        yield from get_choices(self.queryset.model)
+
+    def __len__(self):
+        empty = 1 if self.field.empty_label is not None else 0
+        return len(get_choices(self.queryset.model)) + empty
+
+    def __bool__(self):
+        return self.field.empty_label is not None or \
+            bool(get_choices(self.queryset.model))
+
+
+class CachedFilterChoiceIterator(filter_fields.ModelChoiceIterator,
+                                 CachedModelChoiceIterator):
+    pass
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    iterator = CachedModelChoiceIterator
+
+
+class CachedModelMultipleChoiceField(forms.ModelMultipleChoiceField):
+    iterator = CachedModelChoiceIterator
+
+
+class CachedFilterModelChoiceField(filter_fields.ModelChoiceField):
+    iterator = CachedFilterChoiceIterator
+
+
+class CachedFilterModelMultipleChoiceField(
+        filter_fields.ModelMultipleChoiceField):
+    iterator = CachedFilterChoiceIterator
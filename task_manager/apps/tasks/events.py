@@ -0,0 +1,177 @@
+"""
+Task change events for the live tasks list.
+
+Saving, deleting or relabeling a task publishes an event to the broker of
+the process once the transaction commits. Code changing tasks through
+update() or bulk_create() publishes them itself. The broker keeps the
+latest events numbered in order, so a stream reconnecting with the id of
+the last event it got misses nothing. Streams of other processes do not
+see the events. An event id is the number of the event and the token of
+the broker that published it, so a stream reconnecting to another
+process, or after a restart, does not take the numbers of another
+broker for its own.
+"""
+import asyncio
+import os
+import secrets
+import threading
+import weakref
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import partial
+
+from django.db import transaction
+
+from task_manager.apps.tasks.models import Task
+
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+HISTORY_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    id: int
+    type: str
+    task_id: int
+
+
+class TaskEventBroker:
+    """
+    Events are published from sync code in any thread and awaited by
+    streams in event loops. Every loop with waiting streams has an
+    asyncio.Event, set by the publisher and replaced once set.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.history_size = history_size
+        self.reset()
+
+    def reset(self):
+        self.token = secrets.token_hex(6)
+        self.events = deque(maxlen=self.history_size)
+        self.last_id = 0
+        self.lock = threading.Lock()
+        self.waiters = weakref.WeakKeyDictionary()
+
+    def format_id(self, event_id):
+        """The id of an event sent to the streams"""
+        return f'{self.token}-{event_id}'
+
+    def parse_id(self, value):
+        """The number of an event id of this broker, None for any other id"""
+        token, _, number = value.rpartition('-')
+        if token != self.token or not number.isdigit() or \
+                int(number) > self.last_id:
+            return None
+        return int(number)
+
+    def publish(self, event_type, task_ids):
+        with self.lock:
+            for task_id in task_ids:
+                self.last_id += 1
+                self.events.append(TaskEvent(self.last_id, event_type,
+                                             task_id))
+            waiters = list(self.waiters.items())
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # The loop is closed
+                pass
+
+    def get_events(self, after):
+        """Events published after the one numbered ``after``"""
+        with self.lock:
+            if not self.events or after >= self.last_id:
+                return []
+            first_id = self.events[0].id
+            return list(self.events)[max(after - first_id + 1, 0):]
+
+    def has_events_after(self, after):
+        """False if events after ``after`` were dropped from the history"""
+        with self.lock:
+            return not self.events or after >= self.events[0].id - 1
+
+    def get_waiter(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            waiter = self.waiters.get(loop)
+            if waiter is None or waiter.is_set():
+                waiter = self.waiters[loop] = asyncio.Event()
+            return waiter
+
+    async def wait(self, after, timeout):
+        """Events after ``after``, or none if ``timeout`` seconds passed"""
+        waiter = self.get_waiter()
+        # Anything published before the waiter was registered
+        events = self.get_events(after)
+        if events:
+            return events
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self.get_events(after)
+
+
+class SharedResults:
+    """
+    Results of coroutines shared by the callers of an event loop passing
+    the same key, e.g. the streams with the same filter looking up the
+    tasks of the same events. Failed coroutines are not kept.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.results = weakref.WeakKeyDictionary()
+
+    async def get(self, key, function):
+        loop = asyncio.get_running_loop()
+        results = self.results.setdefault(loop, OrderedDict())
+        if key not in results:
+            task = results[key] = loop.create_task(function())
+            task.add_done_callback(partial(self.discard_failed, results, key))
+            while len(results) > self.size:
+                results.popitem(last=False)
+        # A stream closing must not cancel the lookup of the others
+        return await asyncio.shield(results[key])
+
+    @staticmethod
+    def discard_failed(results, key, task):
+        # The next caller runs a failed lookup again
+        if (task.cancelled() or task.exception() is not None) and \
+                results.get(key) is task:
+            del results[key]
+
+
+broker = TaskEventBroker()
+if hasattr(os, 'register_at_fork'):
+    # A forked server worker starts with a broker of its own
+    os.register_at_fork(after_in_child=broker.reset)
+
+
+def publish_on_commit(event_type, task_ids):
+    task_ids = list(task_ids)
+    if task_ids:
+        transaction.on_commit(lambda: broker.publish(event_type, task_ids))
+
+
+def publish_task_saved(sender, instance, created, **kwargs):
+    publish_on_commit(CREATED if created else UPDATED, [instance.pk])
+
+
+def publish_task_deleted(sender, instance, **kwargs):
+    publish_on_commit(DELETED, [instance.pk])
+
+
+def publish_task_relabeled(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Task):
+        publish_on_commit(UPDATED, [instance.pk])
+    elif pk_set:
+        # label.labels.add(...) changes the tasks in pk_set
+        publish_on_commit(UPDATED, pk_set)
@@ -0,0 +1,87 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from task_manager.apps.tasks.models import TaskLabelRelation
+
+COLUMNS = ('id', 'name', 'description', 'status', 'author', 'executor',
+           'created_at', 'labels')
+
+FIELDS = ('id', 'name', 'description', 'status__name', 'author__username',
+          'executor__username', 'created_at')
+
+# Spreadsheets evaluate the cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object handing written lines back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def get_label_names(task_ids):
+    """Sorted label names of each of the tasks, in one query"""
+    labels = defaultdict(list)
+    relations = TaskLabelRelation.objects.filter(
+        task__in=task_ids
+    ).order_by('label__name').values_list('task', 'label__name')
+    for task, label in relations:
+        labels[task].append(label)
+    return labels
+
+
+def iter_rows(queryset, chunk_size):
+    """
+    Yield task rows as tuples of COLUMNS. The tasks are read through a
+    server-side cursor, labels are loaded with one query per chunk.
+    """
+    rows = queryset.values_list(*FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        labels = get_label_names([row[0] for row in chunk])
+        for row in chunk:
+            yield (*row, labels[row[0]])
+
+
+def escape_formula(value):
+    """Quote text a spreadsheet would run as a formula (CSV injection)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(queryset, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for *row, labels in iter_rows(queryset, chunk_size):
+        yield writer.writerow(
+            [escape_formula(value) for value in (*row, ','.join(labels))]
+        )
+
+
+def iter_jsonl(queryset, chunk_size):
+    for row in iter_rows(queryset, chunk_size):
+        yield json.dumps(dict(zip(COLUMNS, row)),
+                         cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+async def aiter_lines(lines, batch_size):
+    """
+    Async iterator over the lines of a sync iterator, read ``batch_size``
+    at a time in the thread of the sync code. Under ASGI,
+    StreamingHttpResponse reads a sync iterator whole before sending it.
+    """
+    read_batch = sync_to_async(lambda: list(islice(lines, batch_size)))
+    while batch := await read_batch():
+        yield ''.join(batch)
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson'),
+}
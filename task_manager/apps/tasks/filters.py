@@ -1,26 +1,88 @@
 import django_filters
 from django import forms
+from django.db.models import Exists, OuterRef
+from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
-from django_filters import ModelChoiceFilter
+from django_filters import (ChoiceFilter, ModelChoiceFilter,
+                            ModelMultipleChoiceFilter)
 
 from task_manager.apps.labels.models import Label
-from task_manager.apps.tasks.models import Task
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.choices import (
+    CachedFilterModelChoiceField, CachedFilterModelMultipleChoiceField
+)
+from task_manager.apps.tasks.models import Task, TaskLabelRelation
+from task_manager.apps.tasks.search import search_tasks
+from task_manager.apps.users.models import User
+from task_manager.autocomplete import (AutocompleteSelect,
+                                       AutocompleteSelectMultiple)
+
+LABELS_ANY = 'any'
+LABELS_ALL = 'all'
+
+
+class CachedModelChoiceFilter(ModelChoiceFilter):
+    field_class = CachedFilterModelChoiceField
+
+
+class CachedModelMultipleChoiceFilter(ModelMultipleChoiceFilter):
+    field_class = CachedFilterModelMultipleChoiceField
 
 
 class TaskFilter(django_filters.FilterSet):
-    labels = ModelChoiceFilter(queryset=Label.objects.all(),
-                               label=_('Label'))
+    status = CachedModelChoiceFilter(queryset=Status.objects.all(),
+                                     label=_('Status'))
+
+    executor = CachedModelChoiceFilter(
+        queryset=User.objects.all(), label=_('Executor'),
+        widget=AutocompleteSelect(reverse_lazy('users_autocomplete')),
+    )
+
+    labels = CachedModelMultipleChoiceFilter(
+        queryset=Label.objects.all(), label=_('Labels'),
+        method='get_labeled_tasks',
+        widget=AutocompleteSelectMultiple(reverse_lazy('labels_autocomplete')),
+    )
+
+    labels_mode = ChoiceFilter(choices=((LABELS_ANY, _('Any of the labels')),
+                                        (LABELS_ALL, _('All of the labels'))),
+                               empty_label=None,
+                               label=_('Labels match'),
+                               method='get_all_tasks')
 
     name = django_filters.BooleanFilter(field_name='author',
                                         widget=forms.CheckboxInput,
                                         label=_('Own tasks only'),
                                         method='get_own_tasks')
 
+    search = django_filters.CharFilter(label=_('Search'),
+                                       method='get_found_tasks')
+
     def get_own_tasks(self, queryset, name, value):
         if not value:
             return queryset
         return queryset.filter(author=self.request.user)
 
+    def get_labeled_tasks(self, queryset, name, value):
+        if not value:
+            return queryset
+        # Semi-joins instead of joining TaskLabelRelation: no duplicate
+        # rows, and every check is a probe of the (task, label) index.
+        relations = TaskLabelRelation.objects.filter(task=OuterRef('pk'))
+        if self.form.cleaned_data.get('labels_mode') != LABELS_ALL:
+            return queryset.filter(Exists(relations.filter(label__in=value)))
+
+        for label in value:
+            queryset = queryset.filter(Exists(relations.filter(label=label)))
+        return queryset
+
+    def get_found_tasks(self, queryset, name, value):
+        return search_tasks(queryset, value)
+
+    def get_all_tasks(self, queryset, name, value):
+        # The mode is applied by get_labeled_tasks
+        return queryset
+
     class Meta:
         model = Task
         fields = ['status', 'executor']
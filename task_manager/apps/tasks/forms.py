@@ -1,6 +1,17 @@
+from django import forms
 from django.forms import ModelForm
+from django.urls import reverse_lazy
+from django.utils.translation import gettext_lazy as _
 
+from task_manager.apps.labels.models import Label
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.bulk import ACTIONS
+from task_manager.apps.tasks.choices import (CachedModelChoiceField,
+                                             CachedModelMultipleChoiceField)
 from task_manager.apps.tasks.models import Task
+from task_manager.apps.users.models import User
+from task_manager.autocomplete import (AutocompleteSelect,
+                                       AutocompleteSelectMultiple)
 
 
 class TaskForm(ModelForm):
@@ -13,3 +24,77 @@ class TaskForm(ModelForm):
             'executor',
             'labels'
         )
+        field_classes = {
+            'status': CachedModelChoiceField,
+            'executor': CachedModelChoiceField,
+            'labels': CachedModelMultipleChoiceField,
+        }
+        widgets = {
+            'executor': AutocompleteSelect(reverse_lazy('users_autocomplete')),
+            'labels': AutocompleteSelectMultiple(
+                reverse_lazy('labels_autocomplete')
+            ),
+        }
+
+
+class TaskIdsField(forms.Field):
+    """JSON list of task ids"""
+    default_error_messages = {
+        'invalid': _('Enter a list of task ids.'),
+    }
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return []
+        if not isinstance(value, list) or not all(
+                isinstance(pk, int) and not isinstance(pk, bool)
+                for pk in value):
+            raise forms.ValidationError(self.error_messages['invalid'],
+                                        code='invalid')
+        return value
+
+
+class FilterParamsField(forms.Field):
+    """JSON object of TaskFilter parameters"""
+    default_error_messages = {
+        'invalid': _('Enter an object of filter parameters.'),
+    }
+
+    def to_python(self, value):
+        if value is None:
+            return None
+        if not isinstance(value, dict):
+            raise forms.ValidationError(self.error_messages['invalid'],
+                                        code='invalid')
+        return value
+
+
+class BulkTaskForm(forms.Form):
+    """
+    Action on the tasks selected by ids, by filter parameters or by both.
+    An empty filter selects all tasks.
+    """
+    action = forms.ChoiceField(choices=[(name, name) for name in ACTIONS])
+    tasks = TaskIdsField(required=False)
+    filter = FilterParamsField(required=False)
+    status = forms.ModelChoiceField(Status.objects.all(), required=False)
+    executor = forms.ModelChoiceField(User.objects.all(), required=False)
+    labels = forms.ModelMultipleChoiceField(Label.objects.all(),
+                                            required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('tasks') and \
+                cleaned_data.get('filter') is None:
+            raise forms.ValidationError(
+                _('Select the tasks by ids or by a filter.')
+            )
+        field, function = ACTIONS.get(cleaned_data.get('action'), (None, None))
+        if field and not cleaned_data.get(field) and field not in self.errors:
+            self.add_error(field, self.fields[field].error_messages['required'])
+        return cleaned_data
+
+    def get_action(self):
+        """Function of the action and its value"""
+        field, function = ACTIONS[self.cleaned_data['action']]
+        return function, self.cleaned_data.get(field)
@@ -0,0 +1,44 @@
+"""
+Rendered rows of the tasks list, cached per task and language.
+
+A row key holds the task's updated_at and the versions of statuses and
+users, so editing the task or renaming its status, author or executor
+leads to a new key. As keys never go stale, the rows can live in a cache
+local to the process. Rows of tasks read from a replica are not cached:
+the replica may lag behind the versions of the key.
+"""
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.versions import get_version
+from task_manager.apps.users.models import User
+
+ROW_TEMPLATE = 'tasks/task_row.html'
+ROW_TIMEOUT = 24 * 3600
+
+
+def get_row_key(task, prefix):
+    return f'{prefix}:{task.pk}:{task.updated_at.timestamp()}'
+
+
+def render_task_rows(tasks):
+    """HTML of the table rows of tasks, read with a single get_many"""
+    cache = caches['fragments']
+    prefix = (f'task_row:{get_language()}:'
+              f'{get_version(Status)}:{get_version(User)}')
+    keys = [get_row_key(task, prefix) for task in tasks]
+    rows = cache.get_many(keys)
+
+    missing = {}
+    for key, task in zip(keys, tasks):
+        if key not in rows:
+            rows[key] = render_to_string(ROW_TEMPLATE, {'task': task})
+            if task._state.db == DEFAULT_DB_ALIAS:
+                missing[key] = rows[key]
+    if missing:
+        cache.set_many(missing, ROW_TIMEOUT)
+    return [mark_safe(rows[key]) for key in keys]
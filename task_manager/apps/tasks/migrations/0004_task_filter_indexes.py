@@ -0,0 +1,83 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:23
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def remove_duplicate_labels(apps, schema_editor):
+    relation = apps.get_model('tasks', 'TaskLabelRelation')
+    duplicates = relation.objects.values('task', 'label').annotate(
+        first=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    for row in duplicates.iterator():
+        relation.objects.filter(
+            task=row['task'], label=row['label']
+        ).exclude(id=row['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statuses', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('labels', '0001_initial'),
+        ('tasks', '0003_task_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_labels,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='task_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['executor', 'created_at', 'id'], name='task_executor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['executor', 'status', 'created_at', 'id'], name='task_executor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['author', 'status', 'created_at', 'id'], name='task_author_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklabelrelation',
+            index=models.Index(fields=['label', 'task'], name='label_task_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasklabelrelation',
+            constraint=models.UniqueConstraint(fields=('task', 'label'), name='task_label_unique'),
+        ),
+        # Drop the single column indexes only once the composite
+        # indexes leading with the same columns exist
+        migrations.AlterField(
+            model_name='task',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='author', to=settings.AUTH_USER_MODEL, verbose_name='Author'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='executor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='executor', to=settings.AUTH_USER_MODEL, verbose_name='Executor'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='status', to='statuses.status', verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='tasklabelrelation',
+            name='label',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='labels.label'),
+        ),
+        migrations.AlterField(
+            model_name='tasklabelrelation',
+            name='task',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='tasks.task'),
+        ),
+    ]
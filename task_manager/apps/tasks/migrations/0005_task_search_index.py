@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+import task_manager.apps.tasks.search
+from task_manager.apps.tasks.search import (create_search_index,
+                                            drop_search_index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchIndex',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='tasks.task')),
+                ('document', task_manager.apps.tasks.search.FullTextField(db_column='tasks_task_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tasks_task_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:04
+
+from django.db import migrations, models
+import django.utils.timezone
+from task_manager.apps.tasks.search import restore_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_search_index'),
+    ]
+
+    # SQLite rebuilds tasks_task to add or remove the column, which drops
+    # the full-text search triggers
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop,
+                             restore_search_triggers),
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Modification date'),
+            preserve_default=False,
+        ),
+        migrations.RunSQL('UPDATE tasks_task SET updated_at = created_at',
+                          migrations.RunSQL.noop),
+        migrations.RunPython(restore_search_triggers,
+                             migrations.RunPython.noop),
+    ]
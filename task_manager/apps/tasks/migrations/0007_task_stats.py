@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from task_manager.apps.tasks.stats import (create_stats_triggers,
+                                           drop_stats_triggers)
+
+COUNT_TASKS = [
+    """
+    INSERT INTO tasks_taskstat (status_id, executor_id, count)
+    SELECT status_id, executor_id, COUNT(*) FROM tasks_task
+    GROUP BY status_id, executor_id
+    """,
+    """
+    INSERT INTO tasks_labelstat (label_id, count)
+    SELECT label_id, COUNT(*) FROM tasks_tasklabelrelation
+    GROUP BY label_id
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_label_prefix_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('statuses', '0001_initial'),
+        ('tasks', '0006_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelStat',
+            fields=[
+                ('label', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='labels.label')),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('executor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('status', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='statuses.status')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskstat',
+            constraint=models.UniqueConstraint(fields=('status', 'executor'), name='task_stat_unique'),
+        ),
+        migrations.RunSQL(COUNT_TASKS, migrations.RunSQL.noop),
+        migrations.RunPython(create_stats_triggers, drop_stats_triggers),
+    ]
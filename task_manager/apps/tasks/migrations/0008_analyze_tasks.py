@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def analyze_tasks(apps, schema_editor):
+    # The table rebuilt by 0006 has no statistics, without them SQLite
+    # sorts whole tables instead of reading the pagination index
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('ANALYZE tasks_task')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(analyze_tasks, migrations.RunPython.noop),
+    ]
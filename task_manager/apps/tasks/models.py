@@ -3,6 +3,7 @@ from django.utils.translation import gettext_lazy as _
 
 from task_manager.apps.labels.models import Label
 from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.search import FullTextField
 from task_manager.apps.users.models import User
 
 
@@ -13,17 +14,21 @@ class Task(models.Model):
                             unique=True)
     description = models.TextField(max_length=1024,
                                    verbose_name=_('Description'))
+    # Foreign keys are covered by the composite indexes in Meta
     author = models.ForeignKey(User,
                                on_delete=models.PROTECT,
                                related_name='author',
+                               db_index=False,
                                verbose_name=_('Author'))
     executor = models.ForeignKey(User,
                                  on_delete=models.PROTECT,
                                  related_name='executor',
+                                 db_index=False,
                                  verbose_name=_('Executor'))
     status = models.ForeignKey(Status,
                                on_delete=models.PROTECT,
                                related_name='status',
+                               db_index=False,
                                verbose_name=_('Status'))
     labels = models.ManyToManyField(Label,
                                     through='TaskLabelRelation',
@@ -33,16 +38,81 @@ class Task(models.Model):
                                     verbose_name=_('Labels'))
     created_at = models.DateTimeField(auto_now_add=True,
                                       verbose_name=_('Creation date'))
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name=_('Modification date'))
 
     class Meta:
         verbose_name = _('Task')
         verbose_name_plural = _('Tasks')
         ordering = ['id']
+        indexes = [
+            # Keyset pagination of the tasks list and TaskFilter
+            # combinations, all sorted by the pagination key
+            models.Index(fields=['created_at', 'id'],
+                         name='task_created_at_id_idx'),
+            models.Index(fields=['status', 'created_at', 'id'],
+                         name='task_status_created_idx'),
+            models.Index(fields=['executor', 'created_at', 'id'],
+                         name='task_executor_created_idx'),
+            models.Index(fields=['executor', 'status', 'created_at', 'id'],
+                         name='task_executor_status_idx'),
+            models.Index(fields=['author', 'status', 'created_at', 'id'],
+                         name='task_author_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
 class TaskLabelRelation(models.Model):
-    task = models.ForeignKey(Task, on_delete=models.CASCADE)
-    label = models.ForeignKey(Label, on_delete=models.PROTECT)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, db_index=False)
+    label = models.ForeignKey(Label, on_delete=models.PROTECT,
+                              db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'label'],
+                                    name='task_label_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['label', 'task'], name='label_task_idx'),
+        ]
+
+
+class TaskSearchIndex(models.Model):
+    # SQLite FTS5 table of task texts kept in sync by triggers,
+    # see task_manager.apps.tasks.search
+    task = models.OneToOneField(Task,
+                                on_delete=models.DO_NOTHING,
+                                primary_key=True,
+                                db_column='rowid',
+                                related_name='search_index')
+    document = FullTextField(db_column='tasks_task_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'tasks_task_fts'
+
+
+class TaskStat(models.Model):
+    # Tasks by status and executor, counted by database triggers,
+    # see task_manager.apps.tasks.stats
+    status = models.ForeignKey(Status, on_delete=models.CASCADE,
+                               related_name='+', db_index=False)
+    executor = models.ForeignKey(User, on_delete=models.CASCADE,
+                                 related_name='+')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'executor'],
+                                    name='task_stat_unique'),
+        ]
+
+
+class LabelStat(models.Model):
+    # Tasks by label, counted by database triggers
+    label = models.OneToOneField(Label, on_delete=models.CASCADE,
+                                 primary_key=True, related_name='+')
+    count = models.IntegerField(default=0)
@@ -0,0 +1,164 @@
+"""
+Full-text search over task name and description.
+
+PostgreSQL keeps a generated ``search_vector`` column with a GIN index.
+SQLite keeps the ``tasks_task_fts`` FTS5 table in sync with triggers.
+Both are created by the tasks migrations, so rows written through
+bulk_create() or raw SQL are indexed as well. SQLite drops the triggers
+whenever a migration rebuilds tasks_task, such migrations have to run
+restore_search_triggers() afterwards; TestMigrations checks that every
+trigger still exists once the migrations have run.
+"""
+import re
+
+from django.db import connections, models
+from django.db.models import BooleanField, F, FloatField, Lookup
+from django.db.models.expressions import RawSQL
+
+SQLITE_TABLE = 'tasks_task_fts'
+
+POSTGRESQL_CREATE = [
+    """
+    ALTER TABLE tasks_task ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX tasks_task_search_idx ON tasks_task USING gin (search_vector)',
+]
+
+POSTGRESQL_DROP = [
+    'ALTER TABLE tasks_task DROP COLUMN search_vector',
+]
+
+SQLITE_CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5(
+        name, description, content='tasks_task', content_rowid='id'
+    )
+    """,
+    # Matches in the name weigh twice as much as in the description
+    f"""
+    INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rank)
+    VALUES ('rank', 'bm25(2.0, 1.0)')
+    """,
+    f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_insert
+    AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {SQLITE_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_delete
+    AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_update
+    AFTER UPDATE OF name, description ON tasks_task BEGIN
+        INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {SQLITE_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SQLITE_TABLE}',
+]
+
+
+class FullTextField(models.TextField):
+    """The hidden column of an FTS5 table named after the table itself"""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        statements = POSTGRESQL_CREATE
+    else:
+        statements = SQLITE_CREATE + SQLITE_TRIGGERS
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        statements = POSTGRESQL_DROP
+    else:
+        statements = SQLITE_DROP
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def restore_search_triggers(apps, schema_editor):
+    """
+    SQLite drops the triggers whenever a migration rebuilds tasks_task,
+    so such migrations have to run this afterwards.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def search_tasks(queryset, text):
+    """
+    Filter tasks by words of ``text`` (each word also matches as a prefix)
+    and annotate them with ``search_rank``, the higher the better.
+    """
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return queryset.none()
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    return _search_sqlite(queryset, terms)
+
+
+def get_search_ordering(queryset, ordering):
+    """Order search results best match first, anything else by ordering"""
+    if 'search_rank' in queryset.query.annotations:
+        return ('-search_rank', 'id')
+    return ordering
+
+
+def _search_postgresql(queryset, terms):
+    query = ' & '.join(f'{term}:*' for term in terms)
+    column = f'"{queryset.model._meta.db_table}"."search_vector"'
+    tsquery = "to_tsquery('simple', %s)"
+    return queryset.filter(
+        RawSQL(f'{column} @@ {tsquery}', (query,),
+               output_field=BooleanField())
+    ).annotate(
+        # real -> double precision keeps page cursors exact
+        search_rank=RawSQL(f'ts_rank({column}, {tsquery})::float8', (query,),
+                           output_field=FloatField())
+    )
+
+
+def _search_sqlite(queryset, terms):
+    query = ' '.join(f'"{term}"*' for term in terms)
+    # FTS5 rank is negative, the better the match the lower it is
+    return queryset.filter(
+        search_index__document__match=query
+    ).annotate(search_rank=-F('search_index__rank'))
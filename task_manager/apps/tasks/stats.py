@@ -0,0 +1,234 @@
+"""
+Task statistics for the dashboard.
+
+TaskStat counts the tasks of every (status, executor) pair and LabelStat
+the tasks of every label. Database triggers keep both up to date in the
+transaction changing the tasks, whether through save(), update(),
+bulk_create() or raw SQL: row triggers on SQLite, statement triggers
+with transition tables on PostgreSQL, which change every count once per
+statement. The dashboard reads O(#statuses x #executors) rows whatever
+the number of tasks. Counts dropping to zero are kept until
+rebuild_stats() reconciles the tables with the tasks.
+
+SQLite drops the triggers whenever a migration rebuilds tasks_task or
+tasks_tasklabelrelation, such migrations have to run
+restore_stats_triggers() afterwards.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from task_manager.apps.tasks.models import (LabelStat, Task,
+                                            TaskLabelRelation, TaskStat)
+
+# Table: its stats table and the counted columns
+COUNTED = {
+    'tasks_task': ('tasks_taskstat', ('status_id', 'executor_id')),
+    'tasks_tasklabelrelation': ('tasks_labelstat', ('label_id',)),
+}
+TRIGGERS = ('insert', 'delete', 'update')
+# Executors with the most tasks shown by the dashboard
+TOP_EXECUTORS = 50
+
+
+def get_upsert(stats_table, columns, rows_sql):
+    """Add the last column of the ``rows_sql`` rows to the counts"""
+    keys = ', '.join(columns)
+    return f"""
+        INSERT INTO {stats_table} ({keys}, count)
+        {rows_sql}
+        ON CONFLICT ({keys}) DO UPDATE
+        SET count = {stats_table}.count + excluded.count
+    """
+
+
+def get_sqlite_triggers(table, stats_table, columns):
+    def change(row, value):
+        values = ', '.join(f'{row}.{column}' for column in columns)
+        # WHERE true tells the parser ON CONFLICT is not a join constraint
+        return get_upsert(stats_table, columns,
+                          f'SELECT {values}, {value} WHERE true') + ';'
+
+    changed = ' OR '.join(f'old.{column} != new.{column}'
+                          for column in columns)
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {stats_table}_insert
+        AFTER INSERT ON {table} BEGIN {change('new', 1)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {stats_table}_delete
+        AFTER DELETE ON {table} BEGIN {change('old', -1)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {stats_table}_update
+        AFTER UPDATE OF {', '.join(columns)} ON {table} WHEN {changed}
+        BEGIN {change('old', -1)} {change('new', 1)} END
+        """,
+    ]
+
+
+def get_postgresql_triggers(table, stats_table, columns):
+    keys = ', '.join(columns)
+
+    def select(rows):
+        return ', '.join(f'{rows}.{column}' for column in columns)
+
+    def changes(rows, value):
+        return (f'SELECT {select(rows)}, {value} * count(*) FROM {rows} '
+                f'GROUP BY {select(rows)}')
+
+    # Updated rows whose counted columns changed
+    moved = (f'old_rows JOIN new_rows USING (id) '
+             f'WHERE ({select("old_rows")}) <> ({select("new_rows")})')
+    moved_changes = f"""
+        SELECT {keys}, sum(change) FROM (
+            SELECT {select('old_rows')}, -1 AS change FROM {moved}
+            UNION ALL
+            SELECT {select('new_rows')}, 1 FROM {moved}
+        ) AS changes GROUP BY {keys}
+    """
+    # Sorted, so that concurrent statements lock the counts in one order
+    order = f' ORDER BY {keys}'
+    function = f'{stats_table}_count'
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {get_upsert(stats_table, columns,
+                            changes('new_rows', 1) + order)};
+            ELSIF TG_OP = 'DELETE' THEN
+                {get_upsert(stats_table, columns,
+                            changes('old_rows', -1) + order)};
+            ELSE
+                {get_upsert(stats_table, columns, moved_changes + order)};
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"""
+        CREATE TRIGGER {stats_table}_insert AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """,
+        f"""
+        CREATE TRIGGER {stats_table}_delete AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """,
+        f"""
+        CREATE TRIGGER {stats_table}_update AFTER UPDATE ON {table}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """,
+    ]
+
+
+def create_stats_triggers(apps, schema_editor):
+    postgresql = schema_editor.connection.vendor == 'postgresql'
+    for table, (stats_table, columns) in COUNTED.items():
+        if postgresql:
+            statements = get_postgresql_triggers(table, stats_table, columns)
+        else:
+            statements = get_sqlite_triggers(table, stats_table, columns)
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def drop_stats_triggers(apps, schema_editor):
+    postgresql = schema_editor.connection.vendor == 'postgresql'
+    for table, (stats_table, columns) in COUNTED.items():
+        for trigger in TRIGGERS:
+            on_table = f' ON {table}' if postgresql else ''
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS {stats_table}_{trigger}{on_table}'
+            )
+        if postgresql:
+            schema_editor.execute(
+                f'DROP FUNCTION IF EXISTS {stats_table}_count()'
+            )
+
+
+def restore_stats_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        create_stats_triggers(apps, schema_editor)
+
+
+def reconcile(stat_model, fields, counts):
+    """
+    Make the counts of ``stat_model`` match ``counts``, a values() queryset
+    of ``fields`` annotated with the count. Returns the number of fixed
+    counts.
+    """
+    actual = {tuple(row[field] for field in fields): row['count']
+              for row in counts}
+    stored = {tuple(getattr(stat, field) for field in fields): stat
+              for stat in stat_model.objects.all()}
+    outdated, missing = [], []
+    for key, count in actual.items():
+        stat = stored.get(key)
+        if stat is None:
+            missing.append(stat_model(count=count, **dict(zip(fields, key))))
+        elif stat.count != count:
+            stat.count = count
+            outdated.append(stat)
+    stat_model.objects.bulk_create(missing)
+    stat_model.objects.bulk_update(outdated, ['count'])
+    unused = [stat.pk for key, stat in stored.items() if key not in actual]
+    stat_model.objects.filter(pk__in=unused).delete()
+    return len(missing) + len(outdated) + len(unused)
+
+
+def rebuild_stats():
+    """Recount the stats of all tasks, returns the number of fixed counts"""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Concurrent writers wait and count their tasks afterwards
+            with connection.cursor() as cursor:
+                cursor.execute('LOCK TABLE tasks_taskstat, tasks_labelstat '
+                               'IN EXCLUSIVE MODE')
+        fixed = reconcile(
+            TaskStat, ('status_id', 'executor_id'),
+            Task.objects.order_by().values('status_id', 'executor_id')
+            .annotate(count=Count('id')),
+        )
+        fixed += reconcile(
+            LabelStat, ('label_id',),
+            TaskLabelRelation.objects.order_by().values('label_id')
+            .annotate(count=Count('id')),
+        )
+    return fixed
+
+
+def count_tasks(stats, field):
+    """
+    Expression of the tasks counted by ``stats`` for the object of the outer
+    query, ``field`` referring to it. It reads the stats of one object.
+    """
+    totals = stats.filter(**{field: OuterRef('pk')}).order_by() \
+        .values(field).annotate(total=Sum('count')).values('total')
+    return Coalesce(Subquery(totals), 0)
+
+
+async def aget_totals(stats, field, limit=None):
+    """(object, count) pairs of the counts summed by ``field``"""
+    totals = stats.filter(count__gt=0).values(field) \
+        .annotate(total=Sum('count')).order_by('-total', field)[:limit]
+    totals = [(row[field], row['total']) async for row in totals]
+    model = stats.model._meta.get_field(field).related_model
+    objects = await model.objects.ain_bulk([pk for pk, total in totals])
+    return [(objects[pk], total) for pk, total in totals]
+
+
+async def aget_stats():
+    """Task counts by status, executor and label, the largest first"""
+    statuses = await aget_totals(TaskStat.objects.all(), 'status')
+    return {
+        'total': sum(total for status, total in statuses),
+        'statuses': statuses,
+        'executors': await aget_totals(TaskStat.objects.all(), 'executor',
+                                       TOP_EXECUTORS),
+        'labels': await aget_totals(LabelStat.objects.all(), 'label'),
+    }
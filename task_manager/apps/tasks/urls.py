@@ -2,10 +2,14 @@ from django.urls import path
 
 from task_manager.apps.tasks.views import (TasksView, TaskCreateView,
                                            TaskUpdateView, TaskDeleteView,
-                                           TaskInfoView)
+                                           TaskInfoView, TaskExportView,
+                                           TaskEventsView, TaskStatsView)
 
 urlpatterns = [
     path('', TasksView.as_view(), name='tasks_list'),
+    path('events/', TaskEventsView.as_view(), name='tasks_events'),
+    path('stats/', TaskStatsView.as_view(), name='tasks_stats'),
+    path('export/', TaskExportView.as_view(), name='tasks_export'),
     path('<int:pk>/', TaskInfoView.as_view(), name='task_info'),
     path('create/', TaskCreateView.as_view(), name='task_create'),
     path('<int:pk>/update/', TaskUpdateView.as_view(), name='task_update'),
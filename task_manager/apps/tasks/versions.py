@@ -0,0 +1,87 @@
+"""
+Versions of models in the cache.
+
+A version is the time of the last change to any object of the model. The
+post_save and post_delete signals bump it, code writing through
+bulk_create() or update() has to call bump_version() itself. Cache keys
+built from versions never go stale, and a version tells when the model
+was last modified.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Models changed inside defer_versions()
+deferred_models = ContextVar('deferred_models', default=None)
+
+
+def get_version_key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def bump_version(model):
+    cache.set(get_version_key(model), time.time_ns(), None)
+
+
+def get_version(model):
+    """Changes whenever an object of the model is saved or deleted"""
+    version = cache.get(get_version_key(model))
+    if version is None:
+        # Another process may have stored its version in the meantime
+        cache.add(get_version_key(model), time.time_ns(), None)
+        version = cache.get(get_version_key(model))
+    return version
+
+
+async def aget_version(model):
+    version = await cache.aget(get_version_key(model))
+    if version is None:
+        await cache.aadd(get_version_key(model), time.time_ns(), None)
+        version = await cache.aget(get_version_key(model))
+    return version
+
+
+async def aget_modified_at(*models):
+    """Time of the last change to any of the models"""
+    version = max([await aget_version(model) for model in models])
+    return datetime.fromtimestamp(version / 10 ** 9, tz=timezone.utc)
+
+
+def invalidate_version(sender, update_fields=None, **kwargs):
+    # Logins only update last_login, which is never rendered
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    deferred = deferred_models.get()
+    if deferred is not None:
+        deferred.add(sender)
+        return
+    bump_version(sender)
+    # Again after commit, in case a concurrent request cached the old rows
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@contextmanager
+def defer_versions():
+    """
+    Bump the version of every changed model once on exit, instead of once
+    per saved or deleted object.
+    """
+    models = set()
+    token = deferred_models.set(models)
+    try:
+        yield
+    finally:
+        deferred_models.reset(token)
+        for model in models:
+            invalidate_version(model)
+
+
+def invalidate_relation_versions(sender, instance, action, model, **kwargs):
+    """Bump both sides of a many-to-many relation after it changed"""
+    if action.startswith('post_'):
+        invalidate_version(type(instance))
+        invalidate_version(model)
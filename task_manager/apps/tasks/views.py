@@ -1,27 +1,346 @@
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
 from django.contrib.messages.views import SuccessMessageMixin
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import (HttpResponse, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.urls import reverse_lazy
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
-from django.views.generic import CreateView, UpdateView, DeleteView, DetailView
+from django.views.generic import (CreateView, UpdateView, DeleteView,
+                                  DetailView, TemplateView, View)
 from django_filters.views import FilterView
 
+from task_manager.apps.labels.models import Label
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.events import DELETED, SharedResults, broker
+from task_manager.apps.tasks.export import EXPORT_FORMATS, aiter_lines
 from task_manager.apps.tasks.filters import TaskFilter
 from task_manager.apps.tasks.forms import TaskForm
+from task_manager.apps.tasks.fragments import render_task_rows
 from task_manager.apps.tasks.models import Task
+from task_manager.apps.tasks.search import get_search_ordering
+from task_manager.apps.tasks.stats import aget_stats
+from task_manager.apps.tasks.versions import aget_modified_at, aget_version
 from task_manager.apps.users.models import User
-from task_manager.mixins import AuthenticateMixin, AuthorPermissionMixin
+from task_manager.mixins import (AsyncDetailMixin, AsyncListMixin,
+                                 AuthenticateMixin, AuthorPermissionMixin,
+                                 ConditionalGetMixin, KeysetPaginationMixin)
+from task_manager.routers import reads_from_replica
+
+# Models whose names the task pages show
+RENDERED_MODELS = (Status, User, Label)
+FINGERPRINT_TIMEOUT = 3600
+# Query parameters of the tasks list and its events that are not filters
+PAGE_PARAMS = ('cursor', 'page_size', 'last_event_id')
+
+
+async def aget_rendered_versions():
+    return tuple([await aget_version(model) for model in RENDERED_MODELS])
+
+
+def get_filter_params(request):
+    return sorted((name, values) for name, values in request.GET.lists()
+                  if name not in PAGE_PARAMS)
+
+
+def get_export_query(request, export_format):
+    """The filters of the tasks list with the export format"""
+    params = request.GET.copy()
+    for name in (*PAGE_PARAMS, 'format'):
+        params.pop(name, None)
+    params['format'] = export_format
+    return params.urlencode()
+
+
+def get_events_query(request, last_event_id):
+    """The filters of the tasks list with the id its events start after"""
+    params = request.GET.copy()
+    for name in PAGE_PARAMS:
+        params.pop(name, None)
+    params['last_event_id'] = last_event_id
+    return params.urlencode()
+
 
+def is_streaming_supported(request):
+    # A stream would hold a sync worker as long as it is open
+    return isinstance(request, ASGIRequest)
 
-class TasksView(AuthenticateMixin, FilterView):
+
+class TasksView(AuthenticateMixin, ConditionalGetMixin, KeysetPaginationMixin,
+                AsyncListMixin, FilterView):
     template_name = 'tasks/list.html'
     model = Task
     filterset_class = TaskFilter
     context_object_name = 'tasks'
+    # user, tasks page with status/author/executor joined; the session,
+    # the fingerprint, the choices of the filter form and the rows come
+    # from the cache
+    query_budget = 2
+
+    async def get(self, request, *args, **kwargs):
+        # Read before the tasks, the stream of the page starts after it
+        self.last_event_id = broker.format_id(broker.last_id)
+        return await super().get(request, *args, **kwargs)
+
+    async def get_fingerprint(self):
+        if reads_from_replica(Task):
+            # The versions would vouch for rows the replica may lag behind,
+            # and the fingerprint would be cached as current
+            return None
+        fingerprint = await self.get_filter_fingerprint()
+        if fingerprint is None:
+            return None
+        updated_at, count = fingerprint
+        modified_at = await aget_modified_at(Task, *RENDERED_MODELS)
+        if updated_at:
+            modified_at = max(modified_at, updated_at)
+        # A page revalidated after a restart must not keep starting its
+        # stream from an id unknown to the broker
+        last_event_id = self.last_event_id \
+            if is_streaming_supported(self.request) else None
+        return modified_at, (updated_at, count, last_event_id,
+                             await aget_rendered_versions())
+
+    async def get_filter_fingerprint(self):
+        """
+        Latest update time and number of the filtered tasks. Any change to
+        them changes one or the other, so the aggregate only runs again
+        after the version of Task is bumped.
+        """
+        key = repr((get_filter_params(self.request), self.request.user.pk,
+                    await aget_version(Task)))
+        key = 'tasks_fingerprint:' + hashlib.md5(
+            key.encode(), usedforsecurity=False
+        ).hexdigest()
+        fingerprint = await cache.aget(key)
+        if fingerprint is None:
+            filterset, valid = await self.aget_filterset()
+            if not valid:
+                return None
+            aggregate = await filterset.qs.aaggregate(
+                updated_at=Max('updated_at'), count=Count('id')
+            )
+            fingerprint = (aggregate['updated_at'], aggregate['count'])
+            await cache.aset(key, fingerprint, FINGERPRINT_TIMEOUT)
+        return fingerprint
+
+    async def aget_filterset(self):
+        """The filterset and whether its parameters are valid"""
+        filterset = self.get_filterset(self.get_filterset_class())
+        # Validating model choices queries the database
+        valid = not filterset.is_bound or \
+            await sync_to_async(filterset.is_valid)()
+        return filterset, valid
+
+    async def aget_object_list(self):
+        self.filterset, valid = await self.aget_filterset()
+        if not valid and self.get_strict():
+            return self.filterset.queryset.none()
+        return self.filterset.qs
+
+    async def aget_context_data(self, **kwargs):
+        context = await super().aget_context_data(filter=self.filterset,
+                                                  **kwargs)
+        context['task_rows'] = await sync_to_async(render_task_rows)(
+            context['tasks']
+        )
+        context['live_updates'] = is_streaming_supported(self.request)
+        context['events_query'] = get_events_query(self.request,
+                                                   self.last_event_id)
+        context['export_queries'] = {
+            export_format: get_export_query(self.request, export_format)
+            for export_format in EXPORT_FORMATS
+        }
+        return context
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'status', 'author', 'executor'
+        )
+
+    def get_keyset_ordering(self):
+        return get_search_ordering(self.object_list,
+                                   super().get_keyset_ordering())
+
 
+class TaskEventsView(AuthenticateMixin, View):
+    """
+    Server-Sent Events of the tasks list with the filter parameters of the
+    list: the rows of the created or updated tasks matching the filter, and
+    the ids of the deleted tasks and of the others, to remove them from the
+    list. The first stream starts after the event id rendered in the page,
+    so nothing changed in between is missed. Streams are closed after a
+    while, EventSource reconnects with the id of the last event it got; an
+    id unknown to the broker, e.g. from another server process, gets a
+    reload event.
+    """
+    heartbeat = 15
+    lifetime = 300
+    retry = 3000
+    shared_rows = SharedResults()
 
-class TaskInfoView(AuthenticateMixin, DetailView):
+    async def get(self, request, *args, **kwargs):
+        if not is_streaming_supported(request):
+            # Tells EventSource not to reconnect
+            return HttpResponse(status=204)
+        filterset = TaskFilter(request.GET or None, request=request,
+                               queryset=Task.objects.select_related(
+                                   'status', 'author', 'executor'
+                               ))
+        if filterset.is_bound and \
+                not await sync_to_async(filterset.is_valid)():
+            return HttpResponseBadRequest(filterset.errors.as_json(),
+                                          content_type='application/json')
+
+        response = StreamingHttpResponse(
+            self.stream(filterset, self.get_last_event_id()),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Proxies must not buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def get_last_event_id(self):
+        """
+        The number of the last event the client got, or of the last one
+        before its page was rendered. None if the id is not one of the
+        broker of this process.
+        """
+        last_event_id = self.request.headers.get(
+            'Last-Event-ID', self.request.GET.get('last_event_id')
+        )
+        if last_event_id is None:
+            return broker.last_id
+        return broker.parse_id(last_event_id)
+
+    async def stream(self, filterset, last_id):
+        loop = asyncio.get_running_loop()
+        closed_at = loop.time() + self.lifetime
+        yield f'retry: {self.retry}\n\n'
+        if last_id is None or not broker.has_events_after(last_id):
+            yield 'event: reload\ndata: {}\n\n'
+            return
+        while loop.time() < closed_at:
+            events = await broker.wait(last_id, self.heartbeat)
+            if not events:
+                yield ': ping\n\n'
+                continue
+            last_id = events[-1].id
+            yield await self.format_events(filterset, events)
+
+    async def format_events(self, filterset, events):
+        # The last event of every task tells what happened to it
+        latest = {event.task_id: event for event in events}
+        changed = sorted(task_id for task_id, event in latest.items()
+                         if event.type != DELETED)
+        rows = await self.get_rows(filterset, changed,
+                                   (events[0].id, events[-1].id))
+        messages = []
+        for task_id, event in latest.items():
+            if task_id in rows:
+                name, data = 'task', {'id': task_id, 'html': rows[task_id]}
+            else:
+                name, data = 'remove', {'id': task_id}
+            messages.append(f'id: {broker.format_id(event.id)}\n'
+                            f'event: {name}\n'
+                            f'data: {json.dumps(data)}\n\n')
+        return ''.join(messages)
+
+    async def get_rows(self, filterset, task_ids, event_ids):
+        """Rendered rows of the tasks matching the filter, by task id"""
+        if not task_ids:
+            return {}
+        language = translation.get_language()
+        # Only the own tasks filter depends on the user
+        user = self.request.user.pk if filterset.is_bound and \
+            filterset.form.cleaned_data.get('name') else None
+        key = (repr(get_filter_params(self.request)), user, language,
+               event_ids)
+
+        async def lookup():
+            queryset = filterset.qs.filter(pk__in=task_ids)
+            tasks = [task async for task in queryset]
+            with translation.override(language):
+                rows = await sync_to_async(render_task_rows)(tasks)
+            return {task.pk: str(row) for task, row in zip(tasks, rows)}
+
+        return await self.shared_rows.get(key, lookup)
+
+
+class TaskStatsView(AuthenticateMixin, TemplateView):
+    template_name = 'tasks/stats.html'
+    # user, then totals and their objects for statuses, executors, labels
+    query_budget = 7
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context.update(await aget_stats())
+        return self.render_to_response(context)
+
+
+class TaskExportView(AuthenticateMixin, FilterView):
+    model = Task
+    filterset_class = TaskFilter
+    ordering = ('created_at', 'id')
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest(_('Unknown export format'))
+        self.filterset = self.get_filterset(self.get_filterset_class())
+        if not self.filterset.is_valid():
+            return HttpResponseBadRequest(self.filterset.errors.as_json(),
+                                          content_type='application/json')
+
+        queryset = self.filterset.qs.order_by(
+            *get_search_ordering(self.filterset.qs, self.ordering)
+        )
+        write_rows, content_type = EXPORT_FORMATS[export_format]
+        content = write_rows(queryset, self.chunk_size)
+        if is_streaming_supported(request):
+            content = aiter_lines(content, self.chunk_size)
+        response = StreamingHttpResponse(
+            content, content_type=f'{content_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="tasks.{export_format}"'
+        )
+        return response
+
+
+class TaskInfoView(AuthenticateMixin, ConditionalGetMixin, AsyncDetailMixin,
+                   DetailView):
     template_name = 'tasks/task_info.html'
     model = Task
     context_object_name = 'task'
+    # user, fingerprint, task with status/author/executor joined, labels
+    query_budget = 4
+
+    async def get_fingerprint(self):
+        if reads_from_replica(Task):
+            # See TasksView.get_fingerprint()
+            return None
+        updated_at = await Task.objects.filter(
+            pk=self.kwargs['pk']
+        ).values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            return None
+        modified_at = max(updated_at,
+                          await aget_modified_at(*RENDERED_MODELS))
+        return modified_at, (updated_at, await aget_rendered_versions())
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'status', 'author', 'executor'
+        ).prefetch_related('labels')
 
 
 class TaskCreateView(AuthenticateMixin, SuccessMessageMixin, CreateView):
@@ -32,7 +351,8 @@ class TaskCreateView(AuthenticateMixin, SuccessMessageMixin, CreateView):
     success_message = _('Task created successfully')
 
     def form_valid(self, form):
-        form.instance.author = User.objects.get(pk=self.request.user.pk)
+        # The user loaded by the authentication
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
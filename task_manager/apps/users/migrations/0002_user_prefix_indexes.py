@@ -0,0 +1,16 @@
+# Generated by Django 4.2.30 on 2026-10-19 00:12
+
+from django.db import migrations
+from task_manager.indexes import create_prefix_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        create_prefix_indexes('users_user',
+                              ['username', 'first_name', 'last_name']),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:13
+
+from django.db import migrations, models
+import task_manager.indexes
+from task_manager.indexes import drop_prefix_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_prefix_indexes'),
+    ]
+
+    # The raw SQL indexes of 0002 become PrefixIndexes of the model, which
+    # SQLite creates again after rebuilding the table for the AlterFields
+    operations = [
+        drop_prefix_indexes('users_user',
+                            ['username', 'first_name', 'last_name']),
+        migrations.AlterField(
+            model_name='user',
+            name='first_name',
+            field=models.CharField(blank=True, max_length=150, verbose_name='first name'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='last_name',
+            field=models.CharField(blank=True, max_length=150, verbose_name='last name'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=task_manager.indexes.PrefixIndex('username', name='user_username_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=task_manager.indexes.PrefixIndex('first_name', name='user_first_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=task_manager.indexes.PrefixIndex('last_name', name='user_last_name_prefix_idx'),
+        ),
+    ]
@@ -1,7 +1,17 @@
 from django.contrib.auth.models import AbstractUser
 
+from task_manager.indexes import PrefixIndex
+
 
 class User(AbstractUser):
 
+    class Meta(AbstractUser.Meta):
+        # Autocomplete of the executors
+        indexes = [
+            PrefixIndex('username', name='user_username_prefix_idx'),
+            PrefixIndex('first_name', name='user_first_name_prefix_idx'),
+            PrefixIndex('last_name', name='user_last_name_prefix_idx'),
+        ]
+
     def __str__(self):
         return self.get_full_name()
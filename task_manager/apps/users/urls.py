@@ -1,10 +1,13 @@
 from django.urls import path
 
 from task_manager.apps.users.views import (UsersView, UserCreateView,
-                                           UserUpdateView, UserDeleteView)
+                                           UserUpdateView, UserDeleteView,
+                                           UserAutocompleteView)
 
 urlpatterns = [
     path('', UsersView.as_view(), name='users_list'),
+    path('autocomplete/', UserAutocompleteView.as_view(),
+         name='users_autocomplete'),
     path('create/', UserCreateView.as_view(), name='user_create'),
     path('<int:pk>/update/', UserUpdateView.as_view(), name='user_update'),
     path('<int:pk>/delete/', UserDeleteView.as_view(), name='user_delete'),
@@ -1,20 +1,40 @@
 from django.contrib.auth import get_user_model
 from django.contrib.messages.views import SuccessMessageMixin
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import CreateView, DeleteView
 from django.views.generic import ListView, UpdateView
 
+from task_manager.apps.tasks.models import Task, TaskStat
+from task_manager.apps.tasks.stats import count_tasks
 from task_manager.apps.users.forms import UserForm, UpdateUserForm
-from task_manager.mixins import (AuthenticateMixin, PermissionMixin,
-                                 DeleteProtectionMixin)
+from task_manager.autocomplete import AutocompleteView
+from task_manager.mixins import (AsyncListMixin, AuthenticateMixin,
+                                 PermissionMixin, DeleteProtectionMixin)
 
 
-class UsersView(ListView):
+class UsersView(AsyncListMixin, ListView):
     template_name = 'users/list.html'
     model = get_user_model()
     context_object_name = 'users'
 
+    def get_queryset(self):
+        # Authored tasks are not in the stats, the author index counts them
+        authored = Task.objects.filter(author=OuterRef('pk')).order_by() \
+            .values('author').annotate(count=Count('id')).values('count')
+        return super().get_queryset().annotate(
+            authored_count=Coalesce(Subquery(authored), 0),
+            executed_count=count_tasks(TaskStat.objects.all(), 'executor'),
+        )
+
+
+class UserAutocompleteView(AutocompleteView):
+    model = get_user_model()
+    search_fields = ('username', 'first_name', 'last_name')
+    ordering = ('first_name', 'last_name', 'id')
+
 
 class UserCreateView(SuccessMessageMixin, CreateView):
     template_name = 'users/create.html'
@@ -11,6 +11,12 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from task_manager.warmup import warm_up_on_startup
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+# The sync code of every request runs in a thread of its own, which would
+# leave a persistent database connection behind
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
-application = get_asgi_application()
+# Every server process is ready for its first request, see warmup.py
+application = warm_up_on_startup(get_asgi_application())
@@ -0,0 +1,77 @@
+"""
+Autocomplete of users and labels in the task forms and filters.
+
+The executor and labels selects render the selected options only, the
+others are looked up as you type by the autocomplete views, which return
+at most ``limit`` objects with a search field starting with the query,
+ignoring case. Every search field has a PrefixIndex in the Meta.indexes
+of its model, see task_manager.indexes.
+"""
+from django import forms
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.generic import View
+
+from task_manager.mixins import AuthenticateMixin
+
+
+class AutocompleteWidgetMixin:
+    def __init__(self, url, attrs=None, choices=()):
+        super().__init__(attrs, choices)
+        self.url = url
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = str(self.url)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """The empty option and the selected ones, read by their pks"""
+        field = self.choices.field
+        selected = {str(pk) for pk in value if str(pk).isdigit()}
+        options = []
+        if not self.allow_multiple_selected and \
+                field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label,
+                                              not selected, 0, attrs=attrs))
+        if selected:
+            queryset = self.choices.queryset.filter(pk__in=selected)
+            for instance in queryset:
+                options.append(self.create_option(
+                    name, instance.pk, field.label_from_instance(instance),
+                    True, len(options), attrs=attrs,
+                ))
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteWidgetMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteWidgetMixin,
+                                 forms.SelectMultiple):
+    pass
+
+
+class AutocompleteView(AuthenticateMixin, View):
+    """JSON ids and names of the objects matching the ``q`` parameter"""
+    model = None
+    search_fields = ()
+    ordering = ()
+    limit = 10
+    query_kwarg = 'q'
+
+    def get_queryset(self, query):
+        condition = Q()
+        for field in self.search_fields:
+            condition |= Q(**{f'{field}__istartswith': query})
+        return self.model.objects.filter(condition).order_by(*self.ordering)
+
+    async def get(self, request, *args, **kwargs):
+        query = request.GET.get(self.query_kwarg, '').strip()
+        results = []
+        if query:
+            queryset = self.get_queryset(query)[:self.limit]
+            results = [{'id': instance.pk, 'text': str(instance)}
+                       async for instance in queryset]
+        return JsonResponse({'results': results})
@@ -0,0 +1,76 @@
+"""
+Indexes of the case-insensitive prefix lookups (istartswith) of the
+autocomplete views.
+
+A PrefixIndex indexes UPPER(column) with the C collation on PostgreSQL
+and the column with the NOCASE collation on SQLite, the expressions
+istartswith compares. Declared in Meta.indexes, they are part
+of the migration state: SQLite creates them again whenever a migration
+rebuilds their table. The first migrations created them with raw SQL,
+create_prefix_indexes() and drop_prefix_indexes() are kept for those.
+"""
+from django.db import migrations, models
+from django.db.models import F, Func
+
+POSTGRESQL_CREATE = ('CREATE INDEX {name} ON {table} '
+                     '(UPPER({column}::text) text_pattern_ops)')
+SQLITE_CREATE = 'CREATE INDEX {name} ON {table} ({column} COLLATE NOCASE)'
+DROP = 'DROP INDEX IF EXISTS {name}'
+
+
+class PrefixKey(Func):
+    """The indexed expression of a PrefixIndex"""
+
+    def __init__(self, field):
+        super().__init__(F(field))
+
+    def as_sql(self, compiler, connection):
+        column, params = compiler.compile(self.source_expressions[0])
+        return f'{column} COLLATE NOCASE', params
+
+    def as_postgresql(self, compiler, connection):
+        # The expression istartswith compares with LIKE 'prefix%', the C
+        # collation lets the index serve the prefix as a range
+        column, params = compiler.compile(self.source_expressions[0])
+        return f'UPPER({column}::text) COLLATE "C"', params
+
+
+class PrefixIndex(models.Index):
+    """Index of a field for its istartswith lookups"""
+
+    def __init__(self, field, name):
+        super().__init__(PrefixKey(field), name=name)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        return path, (self.expressions[0].source_expressions[0].name,), \
+            {'name': self.name}
+
+
+def create_prefix_indexes(table, columns):
+    """
+    Migration operation indexing the columns for istartswith lookups with
+    raw SQL, used by the migrations written before PrefixIndex
+    """
+    names = {column: f'{table}_{column}_prefix_idx' for column in columns}
+
+    def create(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            statement = POSTGRESQL_CREATE
+        else:
+            statement = SQLITE_CREATE
+        for column, name in names.items():
+            schema_editor.execute(statement.format(name=name, table=table,
+                                                   column=column))
+
+    def drop(apps, schema_editor):
+        for name in names.values():
+            schema_editor.execute(DROP.format(name=name))
+
+    return migrations.RunPython(create, drop)
+
+
+def drop_prefix_indexes(table, columns):
+    """Migration operation dropping the indexes of create_prefix_indexes()"""
+    operation = create_prefix_indexes(table, columns)
+    return migrations.RunPython(operation.reverse_code, operation.code)
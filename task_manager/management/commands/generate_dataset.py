@@ -0,0 +1,160 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task_manager.apps.labels.models import Label
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.models import Task, TaskLabelRelation
+from task_manager.apps.tasks.versions import bump_version
+from task_manager.apps.users.models import User
+
+PREFIX = 'gen'
+PASSWORD = 'password'
+STARTED_AT = datetime(2020, 1, 1, tzinfo=timezone.utc)
+WORDS = (
+    'fix', 'add', 'update', 'remove', 'check', 'review', 'deploy', 'write',
+    'test', 'refactor', 'migrate', 'design', 'document', 'release', 'audit',
+    'login', 'page', 'report', 'invoice', 'search', 'profile', 'cache',
+    'server', 'database', 'backup', 'email', 'export', 'import', 'api',
+    'mobile', 'payment', 'order', 'customer', 'dashboard', 'metrics',
+    'error', 'timeout', 'crash', 'slow', 'broken', 'missing', 'duplicate',
+    'button', 'form', 'filter', 'label', 'status', 'task', 'user', 'team',
+)
+
+
+def zipf_weights(count, exponent):
+    """Cumulative weights of a Zipf distribution over ``count`` ranks"""
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+@contextmanager
+def explicit_created_at(*models):
+    # Lets generated rows keep their own creation dates
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Generates a deterministic dataset of users, statuses, labels '
+            'and tasks with skewed executors and labels for scale testing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--statuses', type=int, default=8)
+        parser.add_argument('--labels', type=int, default=200)
+        parser.add_argument('--tasks', type=int, default=100_000)
+        parser.add_argument('--labels-per-task', type=float, default=2,
+                            help='average number of labels of a task')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent of executor and label usage')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=f'{PREFIX}-').exists():
+            raise CommandError('A generated dataset already exists, '
+                               'use an empty database')
+        self.options = options
+        self.random = random.Random(options['seed'])
+        started = time.monotonic()
+
+        with explicit_created_at(Status, Label, Task):
+            users = self.create_users()
+            statuses = self.create_named(Status, options['statuses'])
+            labels = self.create_named(Label, options['labels'])
+            links = self.create_tasks(users, statuses, labels)
+        # bulk_create() sends no signals
+        for model in (User, Status, Label, Task):
+            bump_version(model)
+
+        elapsed = time.monotonic() - started
+        rows = len(users) + len(statuses) + len(labels) + \
+            options['tasks'] + links
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users, {len(statuses)} statuses, '
+            f'{len(labels)} labels, {options["tasks"]} tasks and {links} '
+            f'label links in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)'
+        ))
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            (User(username=f'{PREFIX}-user-{number}',
+                  first_name=f'First{number}',
+                  last_name=f'Last{number}',
+                  password=password,
+                  date_joined=STARTED_AT)
+             for number in range(self.options['users'])),
+            batch_size=self.options['batch_size'],
+        )
+        return [user.pk for user in users]
+
+    def create_named(self, model, count):
+        objects = model.objects.bulk_create(
+            model(name=f'{PREFIX}-{model._meta.model_name}-{number}',
+                  created_at=STARTED_AT)
+            for number in range(count)
+        )
+        return [instance.pk for instance in objects]
+
+    def create_tasks(self, users, statuses, labels):
+        executor_weights = zipf_weights(len(users), self.options['skew'])
+        label_weights = zipf_weights(len(labels), self.options['skew'])
+        word_weights = zipf_weights(len(WORDS), 1)
+        links = 0
+
+        total, batch_size = self.options['tasks'], self.options['batch_size']
+        for start in range(0, total, batch_size):
+            count = min(batch_size, total - start)
+            executors = self.random.choices(users, cum_weights=executor_weights,
+                                            k=count)
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(
+                    self.build_task(start + offset, executor,
+                                    users, statuses, word_weights)
+                    for offset, executor in enumerate(executors)
+                )
+                relations = [
+                    TaskLabelRelation(task_id=task.pk, label_id=label)
+                    for task in tasks
+                    for label in self.pick_labels(labels, label_weights)
+                ]
+                TaskLabelRelation.objects.bulk_create(relations)
+            links += len(relations)
+            if self.options['verbosity']:
+                self.stdout.write(f'{start + count} tasks generated')
+        return links
+
+    def build_task(self, number, executor, users, statuses, word_weights):
+        words = self.random.choices(WORDS, cum_weights=word_weights, k=12)
+        # Spread creation dates over a year, in the order of ids
+        created_at = STARTED_AT + timedelta(
+            seconds=number * 365 * 24 * 3600 // self.options['tasks']
+        )
+        return Task(name=f'{PREFIX}-task-{number} {" ".join(words[:3])}',
+                    description=' '.join(words),
+                    author_id=self.random.choice(users),
+                    executor_id=executor,
+                    status_id=self.random.choice(statuses),
+                    created_at=created_at)
+
+    def pick_labels(self, labels, label_weights):
+        if not labels:
+            return set()
+        mean = self.options['labels_per_task']
+        count = self.random.randint(0, round(2 * mean))
+        return set(self.random.choices(labels, cum_weights=label_weights,
+                                       k=count))
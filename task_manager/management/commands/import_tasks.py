@@ -0,0 +1,182 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task_manager.apps.labels.models import Label
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks.models import Task, TaskLabelRelation
+from task_manager.apps.tasks.versions import bump_version
+from task_manager.apps.users.models import User
+
+FORMATS = ('csv', 'jsonl')
+
+
+class RowError(ValueError):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Imports tasks from a CSV or JSON Lines file with the columns '
+            'name, description, status, author, executor and labels. '
+            'Statuses and labels are matched by name, users by username.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='file to import, "-" for stdin')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='guessed from the file extension if omitted')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='rows committed per transaction')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='rows per INSERT statement')
+        parser.add_argument('--labels-separator', default=',',
+                            help='separator of label names in CSV files')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='create unknown statuses and labels')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.statuses = dict(Status.objects.values_list('name', 'pk'))
+        self.labels = dict(Label.objects.values_list('name', 'pk'))
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.imported = self.skipped = 0
+
+        started = time.monotonic()
+        with self.open(options['path']) as file:
+            rows = enumerate(self.read(file, self.get_format()), start=1)
+            while chunk := list(islice(rows, options['chunk_size'])):
+                with transaction.atomic():
+                    self.import_chunk(chunk)
+                self.stdout.write(f'{self.imported + self.skipped} rows '
+                                  f'processed')
+        # bulk_create() sends no signals
+        bump_version(Task)
+        self.report(time.monotonic() - started)
+
+    def get_format(self):
+        path = self.options['path']
+        if self.options['format']:
+            return self.options['format']
+        if path.endswith('.csv'):
+            return 'csv'
+        if path.endswith(('.jsonl', '.ndjson')):
+            return 'jsonl'
+        raise CommandError('Unable to guess the format, use --format')
+
+    def open(self, path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+
+    def read(self, file, file_format):
+        if file_format == 'jsonl':
+            return (self.parse_json(line) for line in file if line.strip())
+        separator = self.options['labels_separator']
+        return ({**row, 'labels': [name.strip() for name
+                                   in (row.get('labels') or '').split(separator)
+                                   if name.strip()]}
+                for row in csv.DictReader(file))
+
+    def parse_json(self, line):
+        """The row of a JSON line, the RowError to report if it is invalid"""
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as error:
+            return RowError(f'invalid JSON: {error}')
+        if not isinstance(row, dict):
+            return RowError('not a JSON object')
+        return row
+
+    def import_chunk(self, chunk):
+        names = {row.get('name') for _, row in chunk
+                 if not isinstance(row, RowError)}
+        taken = set(Task.objects.filter(name__in=names)
+                    .values_list('name', flat=True))
+        tasks, labels = [], []
+        for line, row in chunk:
+            try:
+                task, task_labels = self.build_task(row, taken)
+            except RowError as error:
+                self.skipped += 1
+                self.stderr.write(f'Row {line} skipped: {error}')
+                continue
+            taken.add(task.name)
+            tasks.append(task)
+            labels.append(task_labels)
+
+        Task.objects.bulk_create(tasks, batch_size=self.options['batch_size'])
+        TaskLabelRelation.objects.bulk_create(
+            (TaskLabelRelation(task_id=task.pk, label_id=label)
+             for task, task_labels in zip(tasks, labels)
+             for label in task_labels),
+            batch_size=self.options['batch_size'],
+        )
+        self.imported += len(tasks)
+
+    def build_task(self, row, taken):
+        if isinstance(row, RowError):
+            raise row
+        name = self.clean_name(Task, row.get('name'))
+        if name in taken:
+            raise RowError(f'task "{name}" already exists')
+        author = self.resolve_user(row.get('author'))
+        executor = self.resolve_user(row.get('executor'))
+        status = self.check_name(Status, self.statuses, row.get('status'))
+        labels = [self.check_name(Label, self.labels, label)
+                  for label in row.get('labels') or []]
+
+        # The row is valid, its missing status and labels can be created
+        task = Task(name=name,
+                    description=row.get('description') or '',
+                    status_id=self.resolve(Status, self.statuses, status),
+                    author_id=author,
+                    executor_id=executor)
+        return task, {self.resolve(Label, self.labels, label)
+                      for label in labels}
+
+    def clean_name(self, model, name):
+        """
+        The stripped name, checked against the length of the column: a
+        single name too long would make PostgreSQL reject the whole chunk
+        """
+        name = (name or '').strip()
+        model_name = model._meta.model_name
+        if not name:
+            raise RowError(f'{model_name} name is empty')
+        max_length = model._meta.get_field('name').max_length
+        if len(name) > max_length:
+            raise RowError(f'{model_name} name is longer than {max_length} '
+                           f'characters')
+        return name
+
+    def check_name(self, model, lookup, name):
+        """A status or label name which exists or may be created"""
+        if name in lookup:
+            return name
+        if not name or not self.options['create_missing']:
+            raise RowError(f'unknown {model._meta.model_name} "{name}"')
+        return self.clean_name(model, name)
+
+    def resolve(self, model, lookup, name):
+        if name not in lookup:
+            lookup[name] = model.objects.create(name=name).pk
+        return lookup[name]
+
+    def resolve_user(self, username):
+        if username not in self.users:
+            raise RowError(f'unknown user "{username}"')
+        return self.users[username]
+
+    def report(self, elapsed):
+        rate = (self.imported + self.skipped) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} tasks, skipped {self.skipped} rows '
+            f'in {elapsed:.1f} s ({rate:.0f} rows/s)'
+        ))
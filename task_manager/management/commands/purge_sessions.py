@@ -0,0 +1,28 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Deletes expired sessions from the database in small batches, '
+            'each in a transaction of its own, so that the sessions table '
+            'is never locked for long.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='sessions per DELETE statement')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while keys := list(expired.values_list('pk', flat=True)
+                           [:options['batch_size']]):
+            deleted += Session.objects.filter(pk__in=keys).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+        # Cached sessions expire on their own
+        self.stdout.write(f'Deleted {deleted} expired sessions')
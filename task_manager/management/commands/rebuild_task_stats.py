@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from task_manager.apps.tasks.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = ('Recounts the task statistics of the dashboard and fixes the '
+            'counts that do not match the tasks. Database triggers keep '
+            'them up to date, this reconciles them after the triggers were '
+            'missing, e.g. when tasks were restored from a dump.')
+
+    def handle(self, *args, **options):
+        fixed = rebuild_stats()
+        self.stdout.write(f'Fixed {fixed} counts')
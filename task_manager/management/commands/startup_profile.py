@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from task_manager.startup import HANDLERS, profile_startup
+
+
+class Command(BaseCommand):
+    help = ('Starts a new process the way a server worker does and reports '
+            'the duration of every phase of its start and the import time '
+            'of the slowest packages, measured with python -X importtime.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=HANDLERS, default='wsgi',
+                            help='handler created by the process')
+        parser.add_argument('--limit', type=int, default=15,
+                            help='packages to report')
+
+    def handle(self, *args, **options):
+        profile = profile_startup(options['server'])
+        phases = profile['phases']
+        for phase, duration in phases.items():
+            self.stdout.write(f'{phase:<24}{duration:>10.1f} ms')
+        self.stdout.write(f'{"total":<24}{sum(phases.values()):>10.1f} ms')
+        self.stdout.write(f'\nImports: {profile["imports"]:.1f} ms')
+        for package, duration in profile['packages'][:options['limit']]:
+            self.stdout.write(f'{package:<24}{duration:>10.1f} ms')
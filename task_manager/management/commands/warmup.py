@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from task_manager.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = ('Compiles all the templates, loads the URL resolvers and the '
+            'translations, as the server processes do on start when DEBUG '
+            'is off, and reports the templates that do not compile.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        compiled, failed = warm_up()
+        duration = (time.perf_counter() - started) * 1000
+        for name in failed:
+            self.stderr.write(f'Unable to compile {name}')
+        self.stdout.write(f'Compiled {compiled} templates in {duration:.0f} ms')
@@ -0,0 +1,304 @@
+import json
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from task_manager.routers import replica_reads
+
+logger = logging.getLogger('task_manager.timing')
+
+
+class QueryTimer:
+    """Execute wrapper counting the queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = self.view_finished = None
+        self.template_started = self.template_finished = None
+        self.queries = QueryTimer()
+
+    def start_template(self, response):
+        self.view_finished = self.template_started = time.perf_counter()
+        response.add_post_render_callback(self.finish_template)
+
+    def finish_template(self, response):
+        self.template_finished = time.perf_counter()
+
+    def get_metrics(self):
+        """Durations in milliseconds, everything else is in middleware"""
+        finished = time.perf_counter()
+        view = template = 0
+        if self.view_started:
+            view = (self.view_finished or finished) - self.view_started
+        if self.template_started:
+            template = (self.template_finished or finished) - \
+                self.template_started
+        total = finished - self.started
+        return {
+            'total': total * 1000,
+            'view': view * 1000,
+            'template': template * 1000,
+            'middleware': (total - view - template) * 1000,
+            'db': self.queries.duration * 1000,
+        }
+
+
+class AsyncCapableMiddleware(ABC):
+    """
+    Base of middleware serving both WSGI and ASGI. Under ASGI, sync-only
+    middleware would run the rest of the stack and the views from a
+    thread, async views included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    @abstractmethod
+    def handle(self, request):
+        """Process a request under WSGI"""
+
+    @abstractmethod
+    async def __acall__(self, request):
+        """Process a request under ASGI"""
+
+
+class ServerTimingMiddleware(AsyncCapableMiddleware):
+    """
+    Time a sample of requests (SERVER_TIMING_SAMPLE_RATE): the view, the
+    template rendering, the SQL queries and the rest, which is spent in
+    middleware. The timings are logged as a JSON line, and sent in the
+    Server-Timing header to staff users and INTERNAL_IPS only, as they
+    reveal the load of the server. Must be the first middleware to see the
+    others.
+    """
+
+    def handle(self, request):
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        timing = request.server_timing = RequestTiming()
+        with self.time_queries(timing):
+            response = self.get_response(request)
+        return self.add_timing(request, response, timing,
+                               self.is_internal(request))
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+
+        timing = request.server_timing = RequestTiming()
+        # The sync code of a request, the ORM included, runs in one thread
+        # and uses the connections of that thread
+        stack = await sync_to_async(self.time_queries)(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        # Loading the user queries the database
+        internal = await sync_to_async(self.is_internal)(request)
+        return self.add_timing(request, response, timing, internal)
+
+    @staticmethod
+    def is_sampled():
+        return random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+
+    @staticmethod
+    def time_queries(timing):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timing.queries))
+        return stack
+
+    @staticmethod
+    def is_internal(request):
+        if request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    @staticmethod
+    def add_timing(request, response, timing, send_header):
+        metrics = timing.get_metrics()
+        if send_header:
+            entries = {name: f'{name};dur={duration:.1f}'
+                       for name, duration in metrics.items()}
+            entries['db'] += f';desc="{timing.queries.count} queries"'
+            response['Server-Timing'] = ', '.join(entries.values())
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'queries': timing.queries.count,
+            **{f'{name}_ms': round(duration, 1)
+               for name, duration in metrics.items()},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'server_timing'):
+            request.server_timing.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        if hasattr(request, 'server_timing'):
+            request.server_timing.start_template(response)
+        return response
+
+
+class StaticFilesMiddleware(AsyncCapableMiddleware, WhiteNoiseMiddleware):
+    """WhiteNoise, async-capable"""
+
+    def __init__(self, get_response):
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        AsyncCapableMiddleware.__init__(self, get_response)
+
+    def handle(self, request):
+        return WhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # Opens the file
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaMiddleware(AsyncCapableMiddleware):
+    """
+    Let the reads of GET and HEAD requests go to the replicas, unless the
+    client has written less than REPLICA_PIN_SECONDS ago. Requests with
+    other methods pin the client to the primary with a cookie. Streamed
+    responses, iterated after the middleware returns, read from the primary.
+    """
+    cookie_name = 'use_primary'
+    safe_methods = ('GET', 'HEAD')
+
+    def handle(self, request):
+        token = replica_reads.set(self.is_replica_allowed(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        # The context is copied to the threads running the sync code
+        token = replica_reads.set(self.is_replica_allowed(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        return self.pin(request, response)
+
+    def is_replica_allowed(self, request):
+        return request.method in self.safe_methods and \
+            self.cookie_name not in request.COOKIES
+
+    def pin(self, request, response):
+        if request.method not in self.safe_methods and \
+                settings.DATABASE_REPLICAS:
+            response.set_cookie(self.cookie_name, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+def get_request_headers(request):
+    """The HTTP headers of a request, the way the Rollbar notifier reads them"""
+    return {
+        '-'.join(key[len('HTTP_'):].replace('_', ' ').title().split(' ')): value
+        for key, value in request.META.items() if key.startswith('HTTP_')
+    }
+
+
+class RollbarMiddleware(AsyncCapableMiddleware):
+    """
+    Report the exceptions of the views to Rollbar. The notifier and its HTTP
+    client are imported and initialized at the first request instead of
+    when the server process starts, which then skips about 60 ms of imports.
+    """
+
+    def __init__(self, get_response):
+        if not settings.ROLLBAR.get('access_token'):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.notifier = None
+        # The threads of a WSGI worker share the middleware
+        self.notifier_lock = threading.Lock()
+
+    def handle(self, request):
+        try:
+            notifier = self.get_notifier()
+        except MiddlewareNotUsed:
+            # Disabled in the settings
+            return self.get_response(request)
+        return notifier(request)
+
+    async def __acall__(self, request):
+        try:
+            await sync_to_async(self.get_notifier)()
+        except MiddlewareNotUsed:
+            return await self.get_response(request)
+        # The __call__ of the notifier is sync only, it would reset the
+        # session of the request before the response is awaited
+        from rollbar.lib.session import (reset_current_session,
+                                         set_current_session)
+        set_current_session(get_request_headers(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_session()
+
+    def get_notifier(self):
+        with self.notifier_lock:
+            if self.notifier is None:
+                from rollbar.contrib.django.middleware import \
+                    RollbarNotifierMiddleware
+                self.notifier = RollbarNotifierMiddleware(self.get_response)
+        return self.notifier
+
+    def process_exception(self, request, exception):
+        try:
+            notifier = self.get_notifier()
+        except MiddlewareNotUsed:
+            # Disabled in the settings
+            return None
+        return notifier.process_exception(request, exception)
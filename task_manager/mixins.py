@@ -1,21 +1,59 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import ProtectedError
+from django.db.models import PROTECT, Count, Max, ProtectedError
+from django.http import Http404
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
-from django.utils.translation import gettext as _
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language, gettext as _
+
+from task_manager.pagination import InvalidCursor, KeysetPaginator
+
+
+def is_authenticated(request):
+    return request.user.is_authenticated
 
 
 class AuthenticateMixin(LoginRequiredMixin):
     def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.async_dispatch(request, *args, **kwargs)
         if not request.user.is_authenticated:
-            messages.error(request, _('You are not logged in! Please log in.'))
-            return redirect(reverse_lazy('login'))
+            return self.handle_not_authenticated(request)
 
         return super().dispatch(request, *args, **kwargs)
 
+    async def async_dispatch(self, request, *args, **kwargs):
+        # Loads the session and the user, the view can use them afterwards
+        if not await sync_to_async(is_authenticated)(request):
+            return self.handle_not_authenticated(request)
+
+        return await super().dispatch(request, *args, **kwargs)
+
+    def handle_not_authenticated(self, request):
+        messages.error(request, _('You are not logged in! Please log in.'))
+        return redirect(reverse_lazy('login'))
+
+
+class SingleObjectCacheMixin:
+    """
+    Load the object of the request once: the permission checks, get() and
+    post() of the edit views all use the same instance.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
 
-class PermissionMixin(UserPassesTestMixin):
+class PermissionMixin(SingleObjectCacheMixin, UserPassesTestMixin):
     permission_message = None
     permission_url = None
 
@@ -28,24 +66,195 @@ class PermissionMixin(UserPassesTestMixin):
 
 
 class DeleteProtectionMixin:
+    """
+    Reject deleting an object that protected relations still refer to.
+    Every relation is checked with an EXISTS query on its indexed foreign
+    key before anything is deleted, the ProtectedError of the deletion
+    remains for objects referred to in the meantime.
+    """
     rejection_message = None
     rejection_url = None
 
+    def is_in_use(self):
+        pk = self.kwargs[self.pk_url_kwarg]
+        for relation in self.model._meta.related_objects:
+            if relation.on_delete is not PROTECT:
+                continue
+            related = relation.related_model._default_manager
+            if related.filter(**{relation.field.name: pk}).exists():
+                return True
+        return False
+
+    def reject(self, request):
+        messages.error(request, self.rejection_message)
+        return redirect(self.rejection_url)
+
     def post(self, request, *args, **kwargs):
+        if self.is_in_use():
+            return self.reject(request)
         try:
             return super().post(request, *args, **kwargs)
         except ProtectedError:
-            messages.error(request, self.rejection_message)
-            return redirect(self.rejection_url)
+            return self.reject(request)
 
 
-class AuthorPermissionMixin(UserPassesTestMixin):
+class AuthorPermissionMixin(SingleObjectCacheMixin, UserPassesTestMixin):
     author_permission_message = ''
     author_permission_url = ''
 
     def test_func(self):
-        return self.get_object().author == self.request.user
+        # The author is compared by id, without loading it
+        return self.get_object().author_id == self.request.user.pk
 
     def handle_no_permission(self):
         messages.error(self.request, self.author_permission_message)
         return redirect(self.author_permission_url)
+
+
+class KeysetPaginationMixin:
+    keyset_ordering = ('created_at', 'id')
+    page_size = 50
+    max_page_size = 200
+    cursor_kwarg = 'cursor'
+    page_size_kwarg = 'page_size'
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def get_page_size(self):
+        try:
+            page_size = int(self.request.GET[self.page_size_kwarg])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_page_query(self, cursor):
+        params = self.request.GET.copy()
+        params[self.cursor_kwarg] = cursor
+        return params.urlencode()
+
+    def get_paginator(self):
+        return KeysetPaginator(self.object_list, self.get_keyset_ordering(),
+                               self.get_page_size())
+
+    async def aget_context_data(self, **kwargs):
+        try:
+            page = await self.get_paginator().aget_page(
+                self.request.GET.get(self.cursor_kwarg)
+            )
+        except InvalidCursor:
+            raise Http404(_('Invalid page cursor'))
+        return self.get_context_data(page=page, **kwargs)
+
+    def get_page(self):
+        try:
+            return self.get_paginator().get_page(
+                self.request.GET.get(self.cursor_kwarg)
+            )
+        except InvalidCursor:
+            raise Http404(_('Invalid page cursor'))
+
+    def get_context_data(self, page=None, **kwargs):
+        if page is None:
+            # Sync callers read the page here
+            page = self.get_page()
+        kwargs['object_list'] = page.object_list
+        context = super().get_context_data(**kwargs)
+        context['page'] = page
+        if page.has_next:
+            context['next_page_query'] = self.get_page_query(page.next_cursor)
+        if page.has_previous:
+            context['previous_page_query'] = self.get_page_query(
+                page.previous_cursor
+            )
+        return context
+
+
+class AsyncListMixin:
+    """
+    Async get() of list views. The objects are fetched with the async ORM,
+    the template is rendered with the response later on.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.aget_object_list()
+        context = await self.aget_context_data()
+        return self.render_to_response(context)
+
+    async def aget_object_list(self):
+        return self.get_queryset()
+
+    async def aget_context_data(self, **kwargs):
+        object_list = [obj async for obj in self.object_list]
+        return self.get_context_data(object_list=object_list, **kwargs)
+
+
+class AsyncDetailMixin:
+    """Async get() of detail views, see AsyncListMixin"""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+    async def aget_object(self):
+        queryset = self.get_queryset()
+        try:
+            return await queryset.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404(_('No %(verbose_name)s found matching the query') %
+                          {'verbose_name': queryset.model._meta.verbose_name})
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GET requests of async views with 304 before
+    anything is rendered. get_fingerprint() returns the last modification
+    time and a value that changes with the content, or None to always
+    render the page.
+    """
+    modified_field = 'updated_at'
+
+    async def get_fingerprint(self):
+        """
+        Latest modification time and number of the objects of
+        get_queryset(), whose model needs a ``modified_field``. Views whose
+        pages show other data as well extend the fingerprint.
+        """
+        queryset = self.get_queryset()
+        fields = {field.name for field in queryset.model._meta.fields}
+        if self.modified_field not in fields:
+            return None
+        aggregate = await queryset.order_by().aaggregate(
+            modified_at=Max(self.modified_field), count=Count('pk'),
+        )
+        if aggregate['modified_at'] is None:
+            return None
+        return aggregate['modified_at'], aggregate['count']
+
+    def get_etag(self, content):
+        # The pages differ by user and language as well
+        key = repr((content, self.request.user.pk, get_language()))
+        return quote_etag(
+            hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+        )
+
+    async def get(self, request, *args, **kwargs):
+        # Pending messages are shown once, so the page has to be rendered
+        if len(messages.get_messages(request)):
+            return await super().get(request, *args, **kwargs)
+        fingerprint = await self.get_fingerprint()
+        if fingerprint is None:
+            return await super().get(request, *args, **kwargs)
+
+        modified_at, content = fingerprint
+        etag = self.get_etag(content)
+        last_modified = int(modified_at.timestamp())
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        response.headers.setdefault('ETag', etag)
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination that seeks past the last seen ordering key
+    instead of using OFFSET, so every page costs one index range scan
+    no matter how deep it is.
+
+    The last item of ``ordering`` must be unique (usually ``id``).
+    Rows may be model instances or dicts from ``values()``.
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.ordering = [(field.lstrip('-'), field.startswith('-'))
+                         for field in ordering]
+        self.page_size = page_size
+
+    def get_page_queryset(self, cursor=None):
+        direction, key = self.decode_cursor(cursor)
+        backward = direction == BACKWARD
+        queryset = self.queryset.order_by(*self._order_by(backward))
+        if key is not None:
+            queryset = queryset.filter(self._seek(key, backward))
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, cursor=None):
+        return self.make_page(cursor, list(self.get_page_queryset(cursor)))
+
+    async def aget_page(self, cursor=None):
+        rows = [row async for row in self.get_page_queryset(cursor)]
+        return self.make_page(cursor, rows)
+
+    def make_page(self, cursor, rows):
+        direction, key = self.decode_cursor(cursor)
+        backward = direction == BACKWARD
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backward:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, key is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(FORWARD, rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(BACKWARD, rows[0])
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def encode_cursor(self, direction, row):
+        key = [self._value(row, field) for field, _ in self.ordering]
+        # str() keeps full microsecond precision, unlike DjangoJSONEncoder
+        data = json.dumps([direction, key], default=str)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return FORWARD, None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, key = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if direction not in (FORWARD, BACKWARD) \
+                or not isinstance(key, list) \
+                or len(key) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        return direction, self.clean_key(cursor, key)
+
+    def clean_key(self, cursor, key):
+        """Convert the key values of a cursor to the types of their fields"""
+        try:
+            key = [self._get_field(field).to_python(value)
+                   for (field, _), value in zip(self.ordering, key)]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if None in key:
+            raise InvalidCursor(cursor)
+        return key
+
+    def _get_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _order_by(self, backward):
+        return [f'-{field}' if descending != backward else field
+                for field, descending in self.ordering]
+
+    def _seek(self, key, backward):
+        # (a > x) OR (a = x AND b > y) ..., prefixed with a >= x so that
+        # the planner can turn the leading column into an index range.
+        condition = Q()
+        for position, (field, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != backward else 'gt'
+            equal = {name: value for (name, _), value
+                     in zip(self.ordering[:position], key)}
+            condition |= Q(**equal, **{f'{field}__{lookup}': key[position]})
+
+        field, descending = self.ordering[0]
+        bound = 'lte' if descending != backward else 'gte'
+        return Q(**{f'{field}__{bound}': key[0]}) & condition
+
+    @staticmethod
+    def _value(row, field):
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
@@ -0,0 +1,49 @@
+"""
+Routing of the queries between the primary database and its replicas.
+
+Writes always go to the primary. Reads go to one of DATABASE_REPLICAS
+during the GET and HEAD requests the ReplicaMiddleware lets through, and
+to the primary everywhere else: other requests, management commands and
+tasks run outside of requests. After a request that may have written,
+the middleware pins the reads of the client to the primary for
+REPLICA_PIN_SECONDS, so that it reads its own writes whatever the lag of
+the replicas.
+
+A replica may lag behind the versions of task_manager.apps.tasks.versions,
+which the writes on the primary bump, so what is cached under a version
+or validated by one is never read from a replica.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, router
+
+# Whether the reads of the current request may go to a replica
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are saved to the primary as well
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replicas get the schema of the primary by replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def reads_from_replica(model):
+    """Whether the reads of the model go to a replica in this context"""
+    return router.db_for_read(model) != DEFAULT_DB_ALIAS
@@ -0,0 +1,59 @@
+"""
+Session engine of django.contrib.sessions.backends.cached_db, with a
+sliding expiry that costs one write per SESSION_REFRESH_INTERVAL.
+
+Django saves a session when its data changes. This engine saves it as
+well once every SESSION_REFRESH_INTERVAL seconds of use, which moves its
+expiry date: a session used at least once per SESSION_COOKIE_AGE never
+expires. Sessions stay in the cache for SESSION_CACHE_TIMEOUT seconds at
+most, so that a per-host cache serves a session ended on another host for
+that long only. Expired rows are removed by the purge_sessions command.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+
+REFRESHED_AT_KEY = '_refreshed_at'
+
+
+class TimeoutCappedCache:
+    """Cache setting its values for SESSION_CACHE_TIMEOUT seconds at most"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value,
+                       min(timeout, settings.SESSION_CACHE_TIMEOUT))
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+
+class SessionStore(CachedDBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cache = TimeoutCappedCache(self._cache)
+
+    def load(self):
+        data = super().load()
+        if data and self.is_stale(data):
+            # The middleware saves modified sessions and resends the cookie
+            self.modified = True
+        return data
+
+    @staticmethod
+    def is_stale(data):
+        refreshed_at = data.get(REFRESHED_AT_KEY, 0)
+        return time.time() - refreshed_at >= settings.SESSION_REFRESH_INTERVAL
+
+    def save(self, must_create=False):
+        # Every save moves the expiry date
+        session = self._get_session(no_load=must_create)
+        session[REFRESHED_AT_KEY] = int(time.time())
+        super().save(must_create)
@@ -13,12 +13,16 @@ import os
 from pathlib import Path
 
 import dj_database_url
-from dotenv import load_dotenv
 
-load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The settings of the environment, given in a .env file in development
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / '.env')
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
@@ -58,8 +62,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'task_manager.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'task_manager.middleware.StaticFilesMiddleware',
+    'task_manager.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,7 +73,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'rollbar.contrib.django.middleware.RollbarNotifierMiddleware',
+    'task_manager.middleware.RollbarMiddleware',
 ]
 
 ROOT_URLCONF = 'task_manager.urls'
@@ -87,6 +93,16 @@ TEMPLATES = [
         },
     },
 ]
+if not DEBUG:
+    # Templates are compiled once per process, see task_manager.warmup.
+    # With DEBUG on, the default loaders reload the changed templates.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 
 WSGI_APPLICATION = 'task_manager.wsgi.application'
 
@@ -99,10 +115,73 @@ DATABASES = {
     'default':
         dj_database_url.config(
             default='sqlite:///db.sqlite3',
-            conn_max_age=600,
+            # 0 under ASGI, where every request gets its own thread
+            conn_max_age=int(os.getenv('CONN_MAX_AGE', '600')),
         )
 }
 
+# Read replicas, comma-separated URLs, used by the GET requests
+# https://docs.djangoproject.com/en/4.2/topics/db/multi-db/
+
+DATABASE_REPLICAS = []
+for number, url in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = dj_database_url.parse(
+        url.strip(), conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+    )
+
+DATABASE_ROUTERS = ['task_manager.routers.ReplicaRouter']
+
+# Seconds during which the reads of a client who wrote go to the primary,
+# longer than the replication lag
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+
+# Cache shared by all the worker processes, it holds the versions of the
+# cached choices and the sessions. The default file cache is only shared by
+# the processes of one host: deployments on several hosts have to set a
+# shared backend, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# and CACHE_LOCATION=redis://{host}:6379
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', FILE_CACHE)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION',
+                              os.getenv('CACHE_DIR', BASE_DIR / '.cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        } if CACHE_BACKEND == FILE_CACHE else {},
+    },
+    # Rendered fragments with versioned keys, which never go stale
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+# Sessions read from the cache and written through to the database
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/
+
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'task_manager.sessions')
+
+# A local memory cache is only safe with a single worker process, as the
+# others would keep serving sessions deleted on logout
+SESSION_CACHE_ALIAS = os.getenv('SESSION_CACHE_ALIAS', 'default')
+
+# Seconds during which a cache not shared by all the hosts may still serve
+# a session that ended on another host
+SESSION_CACHE_TIMEOUT = int(os.getenv('SESSION_CACHE_TIMEOUT', '300'))
+
+# Seconds of use after which a session is saved again to move its expiry
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', '86400'))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -154,3 +233,26 @@ ROLLBAR = {
     'root': BASE_DIR,
     'patch_debugview': False,
 }
+
+# Share of requests timed by ServerTimingMiddleware, from 0 to 1
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '0'))
+
+# Addresses getting the Server-Timing header besides the staff users
+INTERNAL_IPS = os.getenv('INTERNAL_IPS', '127.0.0.1').split(',')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'task_manager.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,81 @@
+"""
+Profile of the start of a server process.
+
+profile_startup() starts a fresh Python process with ``-X importtime``,
+which boots the project the way a gunicorn or uvicorn worker does, and
+times its phases: loading the settings, setting up the apps, creating
+the handler with its middleware and warming up. The import times the
+interpreter writes to stderr are summed up by top-level package.
+"""
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+BOOT = """
+import json, os, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+started = time.perf_counter()
+phases = {}
+
+def finish(phase):
+    global started
+    now = time.perf_counter()
+    phases[phase] = (now - started) * 1000
+    started = now
+
+from django.conf import settings
+settings.INSTALLED_APPS
+finish('settings')
+import django
+django.setup(set_prefix=False)
+finish('apps')
+from django.core.handlers.%(handler)s import %(handler_class)s
+%(handler_class)s()
+finish('middleware')
+from task_manager.warmup import warm_up
+warm_up()
+finish('warm_up')
+print(json.dumps(phases))
+"""
+HANDLERS = {'wsgi': 'WSGIHandler', 'asgi': 'ASGIHandler'}
+# import time: self [us] | cumulative | imported package
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def parse_import_times(output):
+    """(module, self time, cumulative time, depth) of every import"""
+    imports = []
+    for line in output.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            imports.append((module, int(own) / 1000, int(cumulative) / 1000,
+                            len(indent) // 2))
+    return imports
+
+
+def get_package_times(imports):
+    """Self times of the modules summed by top-level package, slowest first"""
+    packages = defaultdict(float)
+    for module, own, cumulative, depth in imports:
+        packages[module.split('.')[0]] += own
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile_startup(server='wsgi'):
+    """Phase durations and import times in ms of a new server process"""
+    boot = BOOT % {'handler': server, 'handler_class': HANDLERS[server]}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', boot],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    imports = parse_import_times(result.stderr)
+    return {
+        'phases': json.loads(result.stdout.splitlines()[-1]),
+        'imports': sum(own for module, own, cumulative, depth in imports),
+        'packages': get_package_times(imports),
+    }
@@ -0,0 +1,19 @@
+"""
+Settings of the tests, used by ``manage.py test``. With another runner,
+set DJANGO_SETTINGS_MODULE=task_manager.test_settings.
+"""
+from task_manager.settings import *  # noqa: F401,F403
+from task_manager.settings import CACHES, DATABASES
+
+# A second database simulating a lagging replica, created in memory by the
+# tests using it: it gets their fixtures but none of the later writes
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': 'replica',
+}
+
+# The tests never touch the cache of the development server
+CACHES['default'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'tests',
+}
@@ -0,0 +1,216 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse_lazy
+
+from task_manager.apps.labels.models import Label
+from task_manager.apps.tasks.models import Task
+from task_manager.apps.users.models import User
+
+
+class TaskApiTestCase(TestCase):
+    fixtures = ['users.json', 'statuses.json', 'tasks.json', 'labels.json']
+    list_url = reverse_lazy('api_tasks_list')
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(pk=1)
+        self.client.force_login(self.user)
+        self.task_1 = Task.objects.get(pk=1)
+        self.task_1.labels.set(Label.objects.filter(pk__in=[1, 3]))
+
+    def create_tasks(self, count):
+        Task.objects.bulk_create(
+            Task(name=f'Generated task {number}', description='Generated',
+                 author=self.user, executor=self.user, status_id=1)
+            for number in range(count)
+        )
+
+
+class TestTaskApiListView(TaskApiTestCase):
+    def test_list_if_unauthorized(self):
+        self.client.logout()
+        response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_list(self):
+        # user, tasks page, labels of the page
+        with self.assertNumQueries(3):
+            response = self.client.get(self.list_url, {'include': 'labels'})
+        task = response.json()['results'][0]
+
+        self.assertEqual(task['id'], 1)
+        self.assertEqual(task['name'], 'Destroy the Death Star')
+        self.assertEqual(task['status'], 'Finished')
+        self.assertEqual(task['author'], 'Vader')
+        self.assertEqual(task['executor_id'], 3)
+        self.assertEqual(task['labels'], ['Hard', 'Important'])
+        self.assertIsNone(response.json()['next'])
+
+    def test_list_sparse_fields(self):
+        response = self.client.get(self.list_url, {'fields': 'name,status'})
+
+        self.assertEqual(response.json()['results'], [
+            {'name': 'Destroy the Death Star', 'status': 'Finished'},
+            {'name': 'Destroy the rebels base', 'status': 'In process'},
+        ])
+
+    def test_list_unknown_fields(self):
+        response = self.client.get(self.list_url, {'fields': 'name,password',
+                                                   'include': 'author'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_list_filter(self):
+        response = self.client.get(self.list_url, {'executor': 1,
+                                                   'fields': 'id'})
+
+        self.assertEqual(response.json()['results'], [{'id': 2}])
+
+        response = self.client.get(self.list_url, {'executor': 'nobody'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('executor', response.json()['error'])
+
+    def test_list_pagination(self):
+        self.create_tasks(5)
+        ids, url = [], self.list_url + '?page_size=3&fields=id'
+        while url:
+            page = self.client.get(url).json()
+            ids += [task['id'] for task in page['results']]
+            url = page['next']
+
+        self.assertEqual(ids, list(Task.objects.order_by('created_at', 'id')
+                                   .values_list('id', flat=True)))
+        self.assertIsNotNone(page['previous'])
+
+    def test_list_search(self):
+        response = self.client.get(self.list_url, {'search': 'death star',
+                                                   'fields': 'id'})
+
+        self.assertEqual(response.json()['results'][0], {'id': 1})
+
+    def test_list_invalid_cursor(self):
+        response = self.client.get(self.list_url, {'cursor': 'broken'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_tampered_cursor(self):
+        # ["n", ["garbage", 1]]
+        response = self.client.get(self.list_url,
+                                   {'cursor': 'WyJuIiwgWyJnYXJiYWdlIiwgMV1d'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestTaskApiDetailView(TaskApiTestCase):
+    def test_task(self):
+        response = self.client.get(
+            reverse_lazy('api_task_info', kwargs={'pk': 1}),
+            {'fields': 'description', 'include': 'labels'}
+        )
+
+        self.assertEqual(response.json(), {
+            'description': self.task_1.description,
+            'labels': ['Hard', 'Important'],
+        })
+
+    def test_missing_task(self):
+        response = self.client.get(
+            reverse_lazy('api_task_info', kwargs={'pk': 100})
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class TestTaskApiBulkView(TaskApiTestCase):
+    bulk_url = reverse_lazy('api_tasks_bulk')
+
+    def post(self, data):
+        return self.client.post(self.bulk_url, data,
+                                content_type='application/json')
+
+    def test_bulk_if_unauthorized(self):
+        self.client.logout()
+        response = self.post({'action': 'delete', 'tasks': [1]})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(Task.objects.filter(pk=1).exists())
+
+    def test_set_executor_by_filter(self):
+        self.create_tasks(3)
+        response = self.post({'action': 'set_executor', 'executor': 2,
+                              'filter': {'executor': 1}})
+
+        self.assertEqual(response.json()['counts'], {'updated': 4})
+        self.assertFalse(Task.objects.filter(executor=1).exists())
+        task_2 = Task.objects.get(pk=2)
+        self.assertGreater(task_2.updated_at, task_2.created_at)
+
+    def test_set_status_by_ids(self):
+        response = self.post({'action': 'set_status', 'status': 3,
+                              'tasks': [1, 2, 100]})
+
+        self.assertEqual(response.json()['results'], [
+            {'id': 1, 'result': 'unchanged'},
+            {'id': 2, 'result': 'updated'},
+            {'id': 100, 'result': 'not_found'},
+        ])
+        self.assertEqual(Task.objects.get(pk=2).status_id, 3)
+
+    def test_add_and_remove_labels(self):
+        response = self.post({'action': 'add_labels', 'labels': [1, 2],
+                              'tasks': [1, 2]})
+
+        self.assertEqual(response.json()['counts'], {'updated': 2})
+        self.assertEqual(list(self.task_1.labels.values_list('pk', flat=True)),
+                         [1, 2, 3])
+        self.assertEqual(Task.objects.get(pk=2).labels.count(), 2)
+
+        response = self.post({'action': 'remove_labels', 'labels': [3],
+                              'tasks': [1, 2]})
+
+        self.assertEqual(response.json()['results'], [
+            {'id': 1, 'result': 'updated'},
+            {'id': 2, 'result': 'unchanged'},
+        ])
+        self.assertEqual(list(self.task_1.labels.values_list('pk', flat=True)),
+                         [1, 2])
+
+    def test_delete_own_tasks_only(self):
+        self.create_tasks(2)
+        # user, savepoint, selection, tasks for the signals, their labels,
+        # tasks, release
+        with self.assertNumQueries(7):
+            response = self.post({'action': 'delete', 'filter': {}})
+
+        self.assertEqual(response.json()['counts'], {'deleted': 3,
+                                                     'forbidden': 1})
+        self.assertEqual(list(Task.objects.values_list('pk', flat=True)), [2])
+
+    def test_bulk_invalidates_cached_pages(self):
+        self.client.get(reverse_lazy('tasks_list'))
+        self.post({'action': 'set_status', 'status': 1, 'tasks': [2]})
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'status': 1})
+
+        self.assertContains(response, 'Destroy the rebels base')
+
+    def test_bulk_invalid(self):
+        response = self.post({'action': 'set_status', 'tasks': [1]})
+        self.assertIn('status', response.json()['error'])
+
+        response = self.post({'action': 'delete'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post({'action': 'delete', 'tasks': 'all'})
+        self.assertIn('tasks', response.json()['error'])
+
+        response = self.post({'action': 'delete',
+                              'filter': {'status': 'done'}})
+        self.assertIn('status', response.json()['error'])
+
+        response = self.client.post(self.bulk_url, 'tasks',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.count(), 2)
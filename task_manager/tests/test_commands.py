@@ -0,0 +1,290 @@
+import json
+import os
+import runpy
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template.loader import get_template
+from django.template.loaders import filesystem
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from task_manager.apps.labels.models import Label
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.tasks import search, stats
+from task_manager.apps.tasks.models import LabelStat, Task, TaskStat
+from task_manager.apps.users.models import User
+from task_manager.warmup import warm_up_on_startup, warm_up_server
+
+
+class CommandTestCase(TestCase):
+    fixtures = ['users.json', 'statuses.json', 'tasks.json', 'labels.json']
+
+    def call(self, name, *args, **kwargs):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(name, *args, stdout=stdout, stderr=stderr, **kwargs)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+
+class TestImportTasksCommand(CommandTestCase):
+    def test_import_csv(self):
+        path = self.write_file('.csv', (
+            'name,description,status,author,executor,labels\n'
+            'Rescue Han,Carbonite,Started,Princess,Master,"Important,Bug"\n'
+            'Train,Dagobah,In process,Master,Master,\n'
+        ))
+        stdout, _ = self.call('import_tasks', path, '--chunk-size', 1,
+                              '--create-missing')
+        task = Task.objects.get(name='Rescue Han')
+
+        self.assertIn('Imported 2 tasks, skipped 0 rows', stdout)
+        self.assertEqual(task.author.username, 'Princess')
+        self.assertEqual(task.executor.username, 'Master')
+        self.assertEqual(task.status.name, 'Started')
+        self.assertEqual(sorted(task.labels.values_list('name', flat=True)),
+                         ['Bug', 'Important'])
+        self.assertFalse(Task.objects.get(name='Train').labels.exists())
+
+    def test_import_jsonl(self):
+        rows = [
+            {'name': 'Rescue Han', 'description': 'Carbonite',
+             'status': 'Started', 'author': 'Princess',
+             'executor': 'Master', 'labels': ['Important']},
+            {'name': 'Destroy the Death Star', 'description': 'Again',
+             'status': 'Started', 'author': 'Vader', 'executor': 'Vader'},
+            {'name': 'Find Obi-Wan', 'description': '',
+             'status': 'Started', 'author': 'Nobody', 'executor': 'Vader'},
+            {'name': 'Repair the hyperdrive', 'description': '',
+             'status': 'Broken', 'author': 'Vader', 'executor': 'Vader'},
+        ]
+        path = self.write_file('.jsonl', '\n'.join(map(json.dumps, rows)))
+        count = Task.objects.count()
+        stdout, stderr = self.call('import_tasks', path)
+
+        self.assertIn('Imported 1 tasks, skipped 3 rows', stdout)
+        self.assertIn('Row 2 skipped: task "Destroy the Death Star" '
+                      'already exists', stderr)
+        self.assertIn('Row 3 skipped: unknown user "Nobody"', stderr)
+        self.assertIn('Row 4 skipped: unknown status "Broken"', stderr)
+        self.assertEqual(Task.objects.count(), count + 1)
+        self.assertFalse(Status.objects.filter(name='Broken').exists())
+        self.assertEqual(
+            list(Task.objects.get(name='Rescue Han').labels.all()),
+            [Label.objects.get(name='Important')]
+        )
+
+    def test_import_invalid_json(self):
+        row = {'name': 'Rescue Han', 'status': 'Started',
+               'author': 'Princess', 'executor': 'Master'}
+        path = self.write_file('.jsonl', '\n'.join(
+            ['{"name": "Train', '["Train"]', json.dumps(row)]
+        ))
+        stdout, stderr = self.call('import_tasks', path)
+
+        self.assertIn('Imported 1 tasks, skipped 2 rows', stdout)
+        self.assertIn('Row 1 skipped: invalid JSON', stderr)
+        self.assertIn('Row 2 skipped: not a JSON object', stderr)
+        self.assertTrue(Task.objects.filter(name='Rescue Han').exists())
+
+    def test_import_skipped_rows_create_nothing(self):
+        path = self.write_file('.csv', (
+            'name,description,status,author,executor,labels\n'
+            'Rescue Han,,Frozen,Nobody,Master,Carbonite\n'
+            f'{"Train" * 60},,Frozen,Master,Master,Carbonite\n'
+            f'Find Obi-Wan,,Frozen,Master,Master,{"Jedi" * 60}\n'
+        ))
+        stdout, stderr = self.call('import_tasks', path, '--create-missing')
+
+        self.assertIn('Imported 0 tasks, skipped 3 rows', stdout)
+        self.assertIn('Row 2 skipped: task name is longer than 150 '
+                      'characters', stderr)
+        self.assertIn('Row 3 skipped: label name is longer than 150 '
+                      'characters', stderr)
+        self.assertFalse(Status.objects.filter(name='Frozen').exists())
+        self.assertFalse(Label.objects.filter(name='Carbonite').exists())
+
+
+class TestGenerateDatasetCommand(CommandTestCase):
+    options = ('--users', 20, '--statuses', 3, '--labels', 10,
+               '--tasks', 300, '--batch-size', 70, '--seed', 7)
+
+    def get_dataset(self):
+        return [
+            (task.name, task.description, task.author.username,
+             task.executor.username, task.status.name, task.created_at,
+             sorted(label.name for label in task.labels.all()))
+            for task in Task.objects.filter(name__startswith='gen-')
+            .select_related('author', 'executor', 'status')
+            .prefetch_related('labels').order_by('name')
+        ]
+
+    def delete_dataset(self):
+        Task.objects.filter(name__startswith='gen-').delete()
+        Label.objects.filter(name__startswith='gen-').delete()
+        Status.objects.filter(name__startswith='gen-').delete()
+        User.objects.filter(username__startswith='gen-').delete()
+
+    def test_generate_dataset(self):
+        stdout, _ = self.call('generate_dataset', *self.options)
+        dataset = self.get_dataset()
+        executors = Counter(row[3] for row in dataset)
+
+        self.assertIn('Generated 20 users, 3 statuses, 10 labels, '
+                      '300 tasks', stdout)
+        self.assertEqual(len(dataset), 300)
+        self.assertEqual(User.objects.get(username='gen-user-0').first_name,
+                         'First0')
+        self.assertGreater(executors.most_common(1)[0][1], 300 / 20 * 3)
+        self.assertLess(dataset[0][5], dataset[-1][5])
+
+        self.delete_dataset()
+        self.call('generate_dataset', *self.options)
+        self.assertEqual(self.get_dataset(), dataset)
+
+    def test_existing_dataset(self):
+        self.call('generate_dataset', '--tasks', 1, '--users', 1)
+
+        with self.assertRaises(CommandError):
+            self.call('generate_dataset', '--tasks', 1, '--users', 1)
+
+
+class TestPurgeSessionsCommand(CommandTestCase):
+    def test_purge(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(session_key=f'session{number}', session_data='',
+                    expire_date=now + timedelta(days=number - 3, hours=1))
+            for number in range(5)
+        )
+        stdout, _ = self.call('purge_sessions', '--batch-size', 2)
+
+        self.assertIn('Deleted 3 expired sessions', stdout)
+        self.assertEqual(
+            sorted(Session.objects.values_list('session_key', flat=True)),
+            ['session3', 'session4']
+        )
+
+
+class TestRebuildTaskStatsCommand(CommandTestCase):
+    def test_rebuild(self):
+        Task.objects.get(pk=1).labels.set([1, 2])
+        expected = list(TaskStat.objects.filter(count__gt=0).order_by(
+            'status', 'executor'
+        ).values_list('status', 'executor', 'count'))
+        TaskStat.objects.filter(status=3).update(count=5)
+        TaskStat.objects.filter(status=2).delete()
+        LabelStat.objects.filter(label=1).delete()
+        LabelStat.objects.create(label_id=3, count=1)
+
+        stdout, _ = self.call('rebuild_task_stats')
+
+        self.assertIn('Fixed 4 counts', stdout)
+        self.assertEqual(list(TaskStat.objects.order_by(
+            'status', 'executor'
+        ).values_list('status', 'executor', 'count')), expected)
+        self.assertEqual(dict(LabelStat.objects.values_list('label', 'count')),
+                         {1: 1, 2: 1})
+
+
+class TestWarmupCommand(CommandTestCase):
+    def test_warmup(self):
+        stdout, _ = self.call('warmup')
+
+        self.assertRegex(stdout, r'Compiled \d+ templates')
+        with mock.patch.object(filesystem.Loader, 'get_contents') as read:
+            get_template('tasks/list.html')
+            get_template('django_bootstrap5/field_help_text.html')
+        read.assert_not_called()
+
+    def test_no_warm_up_on_import(self):
+        with mock.patch('task_manager.warmup.warm_up') as warm_up:
+            runpy.run_module('task_manager.wsgi')
+            runpy.run_module('task_manager.asgi')
+
+        warm_up.assert_not_called()
+
+    def test_warm_up_gunicorn_worker(self):
+        hooks = runpy.run_path(settings.BASE_DIR / 'gunicorn.conf.py')
+        with mock.patch('task_manager.warmup.warm_up') as warm_up:
+            hooks['post_worker_init'](mock.Mock())
+
+        warm_up.assert_called_once()
+
+    async def test_warm_up_on_lifespan_startup(self):
+        messages = iter([{'type': 'lifespan.startup'},
+                         {'type': 'lifespan.shutdown'}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        application = warm_up_on_startup(mock.AsyncMock())
+        with mock.patch('task_manager.warmup.warm_up') as warm_up:
+            await application({'type': 'lifespan'}, receive, send)
+
+        warm_up.assert_called_once()
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
+
+    @override_settings(DEBUG=True)
+    def test_no_warm_up_with_debug(self):
+        with mock.patch('task_manager.warmup.warm_up') as warm_up:
+            warm_up_server()
+
+        warm_up.assert_not_called()
+
+
+class TestStartupProfileCommand(CommandTestCase):
+    def test_startup_profile(self):
+        stdout, _ = self.call('startup_profile', '--limit', '3')
+        lines = stdout.splitlines()
+
+        for phase in ('settings', 'apps', 'middleware', 'warm_up', 'total'):
+            self.assertTrue(any(line.startswith(phase) for line in lines))
+        self.assertRegex(stdout, r'Imports: [\d.]+ ms')
+        self.assertEqual(len(lines), 5 + 2 + 3)
+        self.assertTrue(lines[-3].startswith('django '))
+
+
+class TestMigrations(CommandTestCase):
+    # makemigrations checks the migration history of every database
+    databases = '__all__'
+
+    def test_no_missing_migrations(self):
+        # Exits with an error if the models differ from the migrations
+        self.call('makemigrations', '--check', '--dry-run')
+
+    def test_triggers_after_migrate(self):
+        # The test database is created by the migrations, any of them
+        # rebuilding a table drops its triggers on SQLite
+        if connection.vendor != 'sqlite':
+            self.skipTest('the triggers are checked on SQLite only')
+        expected = {f'{search.SQLITE_TABLE}_{action}'
+                    for action in ('insert', 'delete', 'update')}
+        expected.update(f'{stats_table}_{action}'
+                        for stats_table, columns in stats.COUNTED.values()
+                        for action in stats.TRIGGERS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            triggers = {name for name, in cursor.fetchall()}
+
+        self.assertLessEqual(expected, triggers)
@@ -1,4 +1,5 @@
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.test import TestCase, Client
 from django.urls import reverse_lazy
@@ -15,6 +16,7 @@ class LabelTestCase(TestCase):
     test_labels = from_json('test_labels.json')
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.get(pk=1)
         self.task = Task.objects.get(pk=1)
@@ -69,6 +71,22 @@ class TestLabelsListView(LabelTestCase):
         self.assertInHTML(self.label_2.name, page)
         self.assertInHTML(self.label_3.name, page)
 
+    def test_labels_tasks_count(self):
+        response = self.client.get(reverse_lazy('labels_list'))
+        counts = {label.pk: label.tasks_count
+                  for label in response.context['labels']}
+
+        self.assertEqual(counts, {1: 1, 2: 1, 3: 0})
+
+
+class TestLabelAutocompleteView(LabelTestCase):
+    def test_autocomplete(self):
+        response = self.client.get(reverse_lazy('labels_autocomplete'),
+                                   {'q': 'im'})
+
+        self.assertEqual(response.json(),
+                         {'results': [{'id': 1, 'text': 'Important'}]})
+
 
 class TestLabelCreateView(LabelTestCase):
     def test_create_label_if_unauthorized(self):
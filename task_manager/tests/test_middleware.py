@@ -0,0 +1,152 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import (AsyncClient, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse_lazy
+from rollbar.lib.session import get_current_session
+
+from task_manager.apps.users.models import User
+from task_manager.middleware import RollbarMiddleware
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class TestServerTimingMiddleware(TestCase):
+    fixtures = ['users.json', 'statuses.json', 'tasks.json', 'labels.json']
+    url = reverse_lazy('tasks_list')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.get(pk=1))
+        self.async_client.force_login(User.objects.get(pk=1))
+
+    def test_timing(self):
+        with self.assertLogs('task_manager.timing') as logs:
+            response = self.client.get(self.url)
+        metrics = dict(
+            entry.split(';', 1) for entry
+            in response['Server-Timing'].split(', ')
+        )
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(set(metrics),
+                         {'total', 'view', 'template', 'middleware', 'db'})
+        self.assertRegex(metrics['db'], r'^dur=[\d.]+;desc="\d+ queries"$')
+        self.assertEqual(record['view'], 'tasks_list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(
+            record['total_ms'], record['view_ms'] + record['template_ms']
+        )
+
+    def test_timing_hidden_from_clients(self):
+        with self.assertLogs('task_manager.timing'):
+            response = self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+
+        self.assertNotIn('Server-Timing', response)
+
+    def test_timing_for_staff(self):
+        User.objects.filter(pk=1).update(is_staff=True)
+        with self.assertLogs('task_manager.timing'):
+            response = self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(self.url)
+
+        self.assertNotIn('Server-Timing', response)
+
+    async def test_timing_async(self):
+        with self.assertLogs('task_manager.timing') as logs:
+            response = await self.async_client.get(self.url)
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertIn('Server-Timing', response)
+        self.assertEqual(record['view'], 'tasks_list')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    async def test_timing_hidden_from_clients_async(self):
+        # The address comes from the ASGI scope
+        client = AsyncClient(client=['10.0.0.1', 0])
+        await sync_to_async(client.force_login)(
+            await User.objects.aget(pk=1)
+        )
+        with self.assertLogs('task_manager.timing'):
+            response = await client.get(self.url)
+
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(ROLLBAR={'access_token': 'token', 'patch_debugview': False})
+class TestRollbarMiddleware(TestCase):
+    def setUp(self):
+        # The notifier initializes the global rollbar module
+        self.init = self.patch('rollbar.init')
+        self.patch('rollbar.BASE_DATA_HOOK', None)
+        self.sessions = []
+
+    def patch(self, target, *args):
+        patcher = mock.patch(target, *args)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def get_response(self, request):
+        self.sessions.append(get_current_session())
+        return HttpResponse()
+
+    def get_session_id(self):
+        session = {item['key']: item['value'] for item in self.sessions[0]}
+        return session.get('session_id')
+
+    @override_settings(ROLLBAR={'access_token': None})
+    def test_without_token(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RollbarMiddleware(self.get_response)
+
+    def test_initialized_on_first_request(self):
+        middleware = RollbarMiddleware(self.get_response)
+        request = RequestFactory().get(
+            '/', HTTP_BAGGAGE='rollbar.session.id=session'
+        )
+
+        self.assertIsNone(middleware.notifier)
+        middleware(request)
+        middleware(request)
+
+        self.assertIsNotNone(middleware.notifier)
+        self.init.assert_called_once()
+        self.assertEqual(self.get_session_id(), 'session')
+
+    async def test_session_async(self):
+        async def get_response(request):
+            return self.get_response(request)
+
+        middleware = RollbarMiddleware(get_response)
+        request = RequestFactory().get(
+            '/', HTTP_BAGGAGE='rollbar.session.id=session'
+        )
+        await middleware(request)
+
+        self.init.assert_called_once()
+        self.assertEqual(self.get_session_id(), 'session')
+        self.assertEqual(get_current_session(), [])
+
+    def test_report_exception(self):
+        middleware = RollbarMiddleware(self.get_response)
+        request = RequestFactory().get('/')
+
+        with mock.patch('rollbar.report_exc_info') as report:
+            middleware.process_exception(request, ValueError())
+            middleware.process_exception(request, ValueError())
+
+        self.init.assert_called_once()
+        self.assertEqual(report.call_count, 2)
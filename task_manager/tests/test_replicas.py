@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from task_manager.apps.statuses.models import Status
+from task_manager.apps.users.models import User
+from task_manager.middleware import ReplicaMiddleware
+from task_manager.routers import ReplicaRouter
+
+
+# The replica is a second test database: both get the fixtures, the
+# objects created afterwards are only on the primary, as if it lagged
+@override_settings(REPLICA_PIN_SECONDS=10)
+class TestReplicaRouting(TransactionTestCase):
+    databases = {'default', 'replica'}
+    fixtures = ['users.json', 'statuses.json']
+    url = reverse_lazy('statuses_list')
+
+    def setUp(self):
+        # Once the fixtures are loaded, which skips the replicas
+        replicas = self.settings(DATABASE_REPLICAS=['replica'])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(User.objects.get(pk=1))
+        Status.objects.create(name='Written to the primary')
+
+    def get_statuses(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [status.name for status in response.context['statuses']]
+
+    def test_read_from_replica(self):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            statuses = self.get_statuses()
+
+        self.assertNotIn('Written to the primary', statuses)
+        self.assertTrue(queries)
+
+    def test_read_own_writes(self):
+        response = self.client.post(reverse_lazy('status_create'),
+                                    data={'name': 'Created'})
+        cookie = response.cookies[ReplicaMiddleware.cookie_name]
+
+        self.assertEqual(cookie['max-age'], 10)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            statuses = self.get_statuses()
+
+        self.assertIn('Created', statuses)
+        self.assertIn('Written to the primary', statuses)
+        self.assertFalse(queries)
+
+    def test_write_to_primary(self):
+        self.client.post(reverse_lazy('status_create'),
+                         data={'name': 'Created'})
+
+        self.assertTrue(Status.objects.filter(name='Created').exists())
+        self.assertFalse(
+            Status.objects.using('replica').filter(name='Created').exists()
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        response = self.client.post(reverse_lazy('status_create'),
+                                    data={'name': 'Created'})
+
+        self.assertNotIn(ReplicaMiddleware.cookie_name, response.cookies)
+        self.assertIn('Written to the primary', self.get_statuses())
+
+    def test_no_migrations_on_replicas(self):
+        router = ReplicaRouter()
+
+        self.assertFalse(router.allow_migrate('replica', 'tasks'))
+        self.assertIsNone(router.allow_migrate('default', 'tasks'))
+
+    def test_choices_read_from_primary(self):
+        response = self.client.get(reverse_lazy('task_create'))
+
+        # Cached under the version bumped by the write, the choices must
+        # not be those of the lagging replica
+        self.assertContains(response, 'Written to the primary')
+
+    def test_no_validators_from_replica(self):
+        response = self.client.get(reverse_lazy('tasks_list'))
+
+        # An ETag would stay valid once the replica caught up
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
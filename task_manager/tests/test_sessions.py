@@ -0,0 +1,64 @@
+import time
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from task_manager.apps.users.models import User
+from task_manager.sessions import SessionStore
+
+
+class TestSessionStore(TestCase):
+    fixtures = ['users.json']
+    url = reverse_lazy('statuses_list')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.get(pk=1))
+        self.session_key = self.client.session.session_key
+
+    def get_expire_date(self):
+        return Session.objects.get(pk=self.session_key).expire_date
+
+    def get_session_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [query for query in queries
+                if 'django_session' in query['sql']]
+
+    def test_read_from_cache(self):
+        expire_date = self.get_expire_date()
+
+        self.assertEqual(self.get_session_queries(), [])
+        self.assertEqual(self.get_expire_date(), expire_date)
+
+    def test_refresh_after_interval(self):
+        expire_date = self.get_expire_date()
+        later = time.time() + 86400
+
+        with mock.patch('time.time', return_value=later):
+            self.assertNotEqual(self.get_session_queries(), [])
+            self.assertEqual(self.get_session_queries(), [])
+        self.assertGreater(self.get_expire_date(), expire_date)
+
+    def test_logout(self):
+        self.client.post(reverse_lazy('logout'))
+
+        self.assertFalse(Session.objects.filter(pk=self.session_key).exists())
+        self.client.cookies['sessionid'] = self.session_key
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_lazy('login'))
+
+    @override_settings(SESSION_CACHE_TIMEOUT=60)
+    def test_cache_timeout(self):
+        store = SessionStore(self.session_key)
+        store['key'] = 'value'
+        with mock.patch.object(cache, 'set') as cache_set:
+            store.save()
+
+        self.assertEqual(cache_set.call_args.args[2], 60)
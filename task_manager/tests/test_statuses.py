@@ -1,4 +1,5 @@
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.test import TestCase, Client
 from django.urls import reverse_lazy
@@ -14,6 +15,7 @@ class StatusTestCase(TestCase):
     test_statuses = from_json('test_statuses.json')
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.get(pk=1)
         self.client.force_login(self.user)
@@ -66,6 +68,15 @@ class TestStatusesListView(StatusTestCase):
         self.assertInHTML(self.status_2.name, page)
         self.assertInHTML(self.status_3.name, page)
 
+    def test_status_tasks_count(self):
+        # The user and the statuses with their counts
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse_lazy('statuses_list'))
+        counts = {status.pk: status.tasks_count
+                  for status in response.context['statuses']}
+
+        self.assertEqual(counts, {1: 0, 2: 1, 3: 1})
+
 
 class TestStatusCreateView(StatusTestCase):
     def test_create_status_if_unauthorized(self):
@@ -168,6 +179,14 @@ class TestStatusDeleteView(StatusTestCase):
                          _('Unable to delete status because it is in use'))
         self.assertEqual(messages[0].level, 40)
 
+    def test_delete_status_if_in_use_checks_exists(self):
+        # The user and the EXISTS query, neither the status nor its tasks
+        with self.assertNumQueries(2) as queries:
+            self.client.post(reverse_lazy('status_delete', kwargs={'pk': 3}))
+
+        self.assertIn('LIMIT 1', queries[-1]['sql'])
+        self.assertEqual(Status.objects.count(), self.count)
+
     def test_delete_status(self):
         response = self.client.post(
             reverse_lazy('status_delete', kwargs={'pk': 1})
@@ -1,14 +1,33 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.test import TestCase, Client
+from django.db.models import Count
+from django.test import AsyncClient, Client, RequestFactory, TestCase
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
+from django.views.generic import ListView
 
 from task_manager.apps.labels.models import Label
+from task_manager.apps.labels.views import LabelsView
 from task_manager.apps.statuses.models import Status
-from task_manager.apps.tasks.models import Task
+from task_manager.apps.statuses.views import StatusesView
+from task_manager.apps.tasks.events import (DELETED, UPDATED,
+                                            SharedResults, TaskEventBroker,
+                                            broker)
+from task_manager.apps.tasks.fragments import render_task_rows
+from task_manager.apps.tasks.models import (LabelStat, Task,
+                                            TaskLabelRelation, TaskStat)
+from task_manager.apps.tasks.views import (TasksView, TaskInfoView,
+                                           TaskExportView, TaskStatsView)
 from task_manager.apps.users.models import User
+from task_manager.apps.users.views import UsersView
 from task_manager.load_data import from_json
+from task_manager.mixins import ConditionalGetMixin, KeysetPaginationMixin
 
 
 class TaskTestCase(TestCase):
@@ -16,6 +35,7 @@ class TaskTestCase(TestCase):
     test_tasks = from_json('test_tasks.json')
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user_1 = User.objects.get(pk=1)
         self.user_2 = User.objects.get(pk=2)
@@ -33,6 +53,17 @@ class TaskTestCase(TestCase):
         self.task_2 = Task.objects.get(pk=2)
         self.tasks_count = Task.objects.count()
 
+    def create_tasks(self, count):
+        users = [self.user_1, self.user_2, self.user_3]
+        Task.objects.bulk_create(
+            Task(name=f'Generated task {number}',
+                 description='Generated',
+                 author=users[number % 3],
+                 executor=users[(number + 1) % 3],
+                 status=[self.status_1, self.status_2][number % 2])
+            for number in range(count)
+        )
+
 
 class TestTasksListView(TaskTestCase):
     def test_tasks_view_if_unauthorized(self):
@@ -80,6 +111,299 @@ class TestTasksListView(TaskTestCase):
         self.assertInHTML(self.task_1.name, page)
         self.assertInHTML(self.task_2.name, page)
 
+    def test_tasks_pagination(self):
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'page_size': 1})
+
+        self.assertEqual(list(response.context['tasks']), [self.task_1])
+        self.assertFalse(response.context['page'].has_previous)
+        self.assertTrue(response.context['page'].has_next)
+
+        response = self.client.get(
+            f'{reverse_lazy("tasks_list")}?'
+            f'{response.context["next_page_query"]}'
+        )
+
+        self.assertEqual(list(response.context['tasks']), [self.task_2])
+        self.assertTrue(response.context['page'].has_previous)
+        self.assertFalse(response.context['page'].has_next)
+
+        response = self.client.get(
+            f'{reverse_lazy("tasks_list")}?'
+            f'{response.context["previous_page_query"]}'
+        )
+
+        self.assertEqual(list(response.context['tasks']), [self.task_1])
+
+    def test_tasks_pagination_keeps_filter(self):
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'executor': self.user_3.pk,
+                                    'page_size': 1})
+
+        self.assertEqual(list(response.context['tasks']), [self.task_1])
+        self.assertFalse(response.context['page'].has_next)
+
+    def test_tasks_page_size_limit(self):
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'page_size': 100000})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['view'].get_page_size(),
+                         response.context['view'].max_page_size)
+
+    def test_tasks_filter_any_label(self):
+        self.task_2.labels.set([self.label_2])
+        response = self.client.get(reverse_lazy('tasks_list'), {
+            'labels': [self.label_1.pk, self.label_2.pk],
+        })
+
+        self.assertEqual(list(response.context['tasks']),
+                         [self.task_1, self.task_2])
+
+    def test_tasks_filter_all_labels(self):
+        self.task_2.labels.set([self.label_2])
+        response = self.client.get(reverse_lazy('tasks_list'), {
+            'labels': [self.label_1.pk, self.label_2.pk],
+            'labels_mode': 'all',
+        })
+
+        self.assertEqual(list(response.context['tasks']), [self.task_1])
+
+    def test_tasks_search(self):
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'death STAR'})
+
+        self.assertEqual(list(response.context['tasks']),
+                         [self.task_1, self.task_2])
+
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'spies'})
+
+        self.assertEqual(list(response.context['tasks']), [self.task_1])
+
+    def test_tasks_search_ranking(self):
+        self.create_tasks(10)
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'rebel'})
+
+        self.assertEqual(list(response.context['tasks']),
+                         [self.task_2, self.task_1])
+
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'rebel', 'page_size': 1})
+        response = self.client.get(
+            f'{reverse_lazy("tasks_list")}?'
+            f'{response.context["next_page_query"]}'
+        )
+
+        self.assertEqual(list(response.context['tasks']), [self.task_1])
+
+    def test_tasks_search_with_filter(self):
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'destroy',
+                                    'executor': self.user_1.pk})
+
+        self.assertEqual(list(response.context['tasks']), [self.task_2])
+
+    def test_tasks_search_follows_updates(self):
+        self.task_2.name = 'Find the droids'
+        self.task_2.save()
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'droid'})
+
+        self.assertEqual(list(response.context['tasks']), [self.task_2])
+
+        self.task_2.delete()
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'search': 'droid'})
+
+        self.assertEqual(list(response.context['tasks']), [])
+
+    def test_tasks_query_budget(self):
+        self.client.get(reverse_lazy('tasks_list'))
+        with self.assertNumQueries(TasksView.query_budget):
+            self.client.get(reverse_lazy('tasks_list'))
+
+        self.create_tasks(40)
+        with self.assertNumQueries(TasksView.query_budget):
+            response = self.client.get(reverse_lazy('tasks_list'))
+
+        self.assertEqual(len(response.context['tasks']), 42)
+
+    def test_tasks_invalid_cursor(self):
+        response = self.client.get(reverse_lazy('tasks_list'),
+                                   {'cursor': 'broken'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_tasks_pagination_sync(self):
+        class SyncTasksView(KeysetPaginationMixin, ListView):
+            model = Task
+            page_size = 1
+
+        view = SyncTasksView()
+        view.setup(RequestFactory().get('/'))
+        view.object_list = view.get_queryset()
+        context = view.get_context_data()
+
+        self.assertEqual(context['object_list'], [self.task_1])
+        self.assertIn('next_page_query', context)
+
+    def test_tasks_tampered_cursor(self):
+        # ["n", ["garbage", 1]], ["n", [null, 1]], ["n", [{"a": 1}, 1]]
+        cursors = ['WyJuIiwgWyJnYXJiYWdlIiwgMV1d', 'WyJuIiwgW251bGwsIDFdXQ',
+                   'WyJuIiwgW3siYSI6IDF9LCAxXV0']
+        for cursor in cursors:
+            for params in ({}, {'search': 'death star'}):
+                response = self.client.get(reverse_lazy('tasks_list'),
+                                           {'cursor': cursor, **params})
+
+                self.assertEqual(response.status_code, 404)
+
+    def test_tasks_rows_cached(self):
+        self.client.get(reverse_lazy('tasks_list'))
+
+        with mock.patch('task_manager.apps.tasks.fragments.render_to_string'
+                        ) as render:
+            response = self.client.get(reverse_lazy('tasks_list'))
+
+        render.assert_not_called()
+        self.assertContains(response, self.task_1.name)
+
+    def test_tasks_rows_from_replica(self):
+        tasks = list(Task.objects.select_related('status', 'author',
+                                                 'executor'))
+        # Read from a replica, which may lag behind the versions
+        tasks[0]._state.db = 'replica'
+        render_task_rows(tasks)
+
+        with mock.patch('task_manager.apps.tasks.fragments.render_to_string',
+                        return_value='') as render:
+            render_task_rows(tasks)
+
+        render.assert_called_once_with('tasks/task_row.html',
+                                       {'task': tasks[0]})
+
+    def test_tasks_rows_invalidated(self):
+        self.client.get(reverse_lazy('tasks_list'))
+        self.task_1.name = 'Rebuild the Death Star'
+        self.task_1.save()
+        self.status_2.name = 'Renamed'
+        self.status_2.save()
+        self.user_3.first_name = 'Ben'
+        self.user_3.save()
+        response = self.client.get(reverse_lazy('tasks_list'))
+
+        self.assertContains(response, 'Rebuild the Death Star')
+        self.assertContains(response, 'Renamed')
+        self.assertContains(response, 'Ben Skywalker')
+
+    def test_tasks_rows_language(self):
+        ru = self.client.get(reverse_lazy('tasks_list'),
+                             HTTP_ACCEPT_LANGUAGE='ru')
+        en = self.client.get(reverse_lazy('tasks_list'),
+                             HTTP_ACCEPT_LANGUAGE='en')
+
+        self.assertNotEqual(ru.context['task_rows'], en.context['task_rows'])
+        self.assertIn('Update', en.context['task_rows'][0])
+
+    def test_tasks_filter_choices_invalidated(self):
+        self.client.get(reverse_lazy('tasks_list'))
+        self.status_1.name = 'Renamed'
+        self.status_1.save()
+        Label.objects.create(name='New label')
+        response = self.client.get(reverse_lazy('tasks_list'))
+        form = response.context['filter'].form
+
+        self.assertIn((self.status_1.pk, 'Renamed'),
+                      list(form.fields['status'].choices))
+        self.assertIn('New label',
+                      [label for _, label in form.fields['labels'].choices])
+
+
+class TestTasksExportView(TaskTestCase):
+    def export(self, **params):
+        response = self.client.get(reverse_lazy('tasks_export'), params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_if_unauthorized(self):
+        self.client.logout()
+        response = self.client.get(reverse_lazy('tasks_export'))
+
+        self.assertRedirects(response, reverse_lazy('login'))
+
+    def test_export_csv(self):
+        response, content = self.export(format='csv')
+        lines = content.splitlines()
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0], 'id,name,description,status,author,'
+                                   'executor,created_at,labels')
+        self.assertTrue(lines[1].startswith('1,Destroy the Death Star,'))
+        self.assertTrue(lines[1].endswith(',"Important,Not important"'))
+
+    def test_export_csv_formulas(self):
+        Task.objects.filter(pk=self.task_1.pk).update(
+            name='=HYPERLINK("http://evil")', description='@SUM(A1)'
+        )
+        _, content = self.export(format='csv')
+
+        self.assertIn('"\'=HYPERLINK(""http://evil"")",\'@SUM(A1)', content)
+
+    def test_export_links(self):
+        url = reverse_lazy('tasks_list')
+        response = self.client.get(url, {'labels_mode': 'any', 'page_size': 1})
+        response = self.client.get(
+            f'{url}?{response.context["next_page_query"]}&format=jsonl'
+        )
+        queries = response.context['export_queries']
+
+        self.assertEqual(queries['csv'], 'labels_mode=any&format=csv')
+        self.assertEqual(queries['jsonl'], 'labels_mode=any&format=jsonl')
+
+    def test_export_jsonl_with_filter(self):
+        _, content = self.export(format='jsonl', executor=self.user_1.pk)
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['name'], self.task_2.name)
+        self.assertEqual(rows[0]['executor'], self.user_1.username)
+        self.assertEqual(rows[0]['labels'], [])
+
+    def test_export_unknown_format(self):
+        response = self.client.get(reverse_lazy('tasks_export'),
+                                   {'format': 'xml'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_queries(self):
+        self.create_tasks(40)
+        TaskExportView.chunk_size = 10
+        self.addCleanup(setattr, TaskExportView, 'chunk_size', 2000)
+
+        # user, then tasks and their labels for each of 5 chunks
+        with self.assertNumQueries(1 + 1 + 5):
+            _, content = self.export(format='csv')
+
+        self.assertEqual(len(content.splitlines()), 43)
+
+    async def test_export_streams_under_asgi(self):
+        await sync_to_async(self.create_tasks)(40)
+        TaskExportView.chunk_size = 10
+        self.addCleanup(setattr, TaskExportView, 'chunk_size', 2000)
+        await sync_to_async(self.async_client.force_login)(self.user_1)
+
+        response = await self.async_client.get(reverse_lazy('tasks_export'),
+                                               {'format': 'csv'})
+        chunks = [chunk.decode()
+                  async for chunk in response.streaming_content]
+
+        # Sent chunk by chunk instead of read whole before the first byte
+        self.assertTrue(response.is_async)
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks],
+                         [10, 10, 10, 10, 3])
+
 
 class TestTaskCreateView(TaskTestCase):
     def test_create_task_if_unauthorized(self):
@@ -95,6 +419,24 @@ class TestTaskCreateView(TaskTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, template_name='tasks/create.html')
 
+    def test_create_task_cached_choices(self):
+        self.client.get(reverse_lazy('task_create'))
+        self.client.force_login(self.user_2)
+        User.objects.bulk_create(
+            User(username=f'user{number}', first_name='Generated')
+            for number in range(50)
+        )
+
+        # user only, logins keep the status choices and executors and
+        # labels are looked up as you type
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse_lazy('task_create'))
+
+        self.assertContains(response, 'data-autocomplete-url="'
+                                      f'{reverse_lazy("users_autocomplete")}"')
+        self.assertNotContains(response, self.user_3.get_full_name())
+        self.assertNotContains(response, 'Generated')
+
     def test_create_task(self):
         valid_task = self.test_tasks['create']
         response = self.client.post(reverse_lazy('task_create'),
@@ -104,6 +446,8 @@ class TestTaskCreateView(TaskTestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse_lazy('tasks_list'))
         self.assertEqual(Task.objects.count(), self.tasks_count + 1)
+        self.assertEqual(Task.objects.get(name=valid_task['name']).author,
+                         self.user_1)
 
         self.assertEqual(len(messages), 1)
         self.assertEqual(messages[0].message,
@@ -129,6 +473,18 @@ class TestTaskUpdateView(TaskTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, template_name='tasks/update.html')
 
+    def test_update_task_selected_choices(self):
+        response = self.client.get(
+            reverse_lazy('task_update', kwargs={'pk': 1})
+        )
+
+        self.assertContains(response, '<option value="3" selected>'
+                                      'Luke Skywalker</option>', html=True)
+        self.assertContains(response, '<option value="1" selected>'
+                                      'Important</option>', html=True)
+        self.assertNotContains(response, self.user_2.get_full_name())
+        self.assertNotContains(response, 'Hard')
+
     def test_update_task(self):
         task_data = self.test_tasks['update']
         response = self.client.post(
@@ -170,9 +526,11 @@ class TestTaskDeleteView(TaskTestCase):
         self.assertTemplateUsed(response, template_name='tasks/delete.html')
 
     def test_delete_task_not_author(self):
-        response = self.client.post(
-            reverse_lazy('task_delete', kwargs={'pk': 2})
-        )
+        # The user and the task, compared by its author id
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                reverse_lazy('task_delete', kwargs={'pk': 2})
+            )
         messages = list(get_messages(response.wsgi_request))
 
         self.assertEqual(response.status_code, 302)
@@ -230,3 +588,322 @@ class TestTaskPageView(TaskTestCase):
         self.assertInHTML(task_data['created_at'], page)
         self.assertInHTML(task_data['labels'][0], page)
         self.assertInHTML(task_data['labels'][1], page)
+
+    def test_task_page_query_budget(self):
+        self.task_1.labels.add(Label.objects.get(pk=3))
+
+        with self.assertNumQueries(TaskInfoView.query_budget):
+            self.client.get(reverse_lazy('task_info', kwargs={'pk': 1}))
+
+
+class TestTasksConditionalGet(TaskTestCase):
+    list_url = reverse_lazy('tasks_list')
+    info_url = reverse_lazy('task_info', kwargs={'pk': 1})
+
+    def test_tasks_not_modified(self):
+        response = self.client.get(self.list_url)
+
+        # user only, the fingerprint is cached
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.list_url,
+                                     HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertIn('private', response['Cache-Control'])
+
+        cached = self.client.get(
+            self.list_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_default_fingerprint(self):
+        class DefaultView(ConditionalGetMixin, ListView):
+            pass
+
+        tasks, statuses = DefaultView(model=Task), DefaultView(model=Status)
+        latest = await Task.objects.order_by('-updated_at').afirst()
+
+        self.assertEqual(await tasks.get_fingerprint(),
+                         (latest.updated_at, 2))
+        self.assertIsNone(await statuses.get_fingerprint())
+
+    def test_tasks_modified(self):
+        etag = self.client.get(self.list_url, {'status': 2})['ETag']
+        own_etag = self.client.get(self.list_url, {'name': 'on'})['ETag']
+        self.task_2.delete()
+
+        self.assertEqual(self.client.get(self.list_url, {'status': 2},
+                                         HTTP_IF_NONE_MATCH=etag).status_code,
+                         200)
+        self.client.force_login(self.user_2)
+        self.assertEqual(self.client.get(self.list_url, {'name': 'on'},
+                                         HTTP_IF_NONE_MATCH=own_etag
+                                         ).status_code, 200)
+
+    def test_tasks_labels_modified(self):
+        etag = self.client.get(self.list_url, {'labels': 3})['ETag']
+        self.task_2.labels.add(Label.objects.get(pk=3))
+        response = self.client.get(self.list_url, {'labels': 3},
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['tasks']), [self.task_2])
+
+    def test_tasks_pending_messages(self):
+        etag = self.client.get(self.list_url)['ETag']
+        # Only the author can delete the task, the refusal is a message
+        self.client.post(reverse_lazy('task_delete', kwargs={'pk': 2}))
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['messages']), 1)
+
+    def test_task_page_not_modified(self):
+        etag = self.client.get(self.info_url)['ETag']
+        response = self.client.get(self.info_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_task_page_modified(self):
+        etag = self.client.get(self.info_url)['ETag']
+        self.user_3.last_name = 'Solo'
+        self.user_3.save()
+        response = self.client.get(self.info_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Solo')
+
+        self.task_1.description = 'Once again'
+        self.task_1.save()
+        response = self.client.get(self.info_url,
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertContains(response, 'Once again')
+
+
+class TestTasksAsyncViews(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.async_client.force_login(self.user_1)
+
+    def test_views_are_async(self):
+        for view in (TasksView, TaskInfoView, LabelsView, StatusesView,
+                     UsersView):
+            self.assertTrue(view.view_is_async, view.__name__)
+
+    async def test_tasks_list(self):
+        response = await self.async_client.get(reverse_lazy('tasks_list'),
+                                               {'status': 2})
+
+        self.assertContains(response, 'Destroy the rebels base')
+        self.assertNotContains(response, 'Destroy the Death Star')
+
+        response = await self.async_client.get(
+            reverse_lazy('tasks_list'), {'status': 2},
+            headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_task_page(self):
+        response = await self.async_client.get(
+            reverse_lazy('task_info', kwargs={'pk': 1})
+        )
+        self.assertContains(response, 'Destroy the Death Star')
+
+        response = await self.async_client.get(
+            reverse_lazy('task_info', kwargs={'pk': 100})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_if_unauthorized(self):
+        response = await AsyncClient().get(reverse_lazy('tasks_list'))
+
+        self.assertRedirects(response, reverse_lazy('login'),
+                             fetch_redirect_response=False)
+
+
+class TestTaskEventsView(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.async_client.force_login(self.user_1)
+        self.events_url = reverse_lazy('tasks_events')
+
+    def change_tasks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task_2.name = 'Find the rebels base'
+            self.task_2.save()
+            self.task_1.save()
+
+    def test_broker(self):
+        events = TaskEventBroker(history_size=2)
+        events.publish(UPDATED, [1, 2])
+        events.publish(DELETED, [3])
+
+        self.assertEqual([(event.type, event.task_id)
+                          for event in events.get_events(1)],
+                         [(UPDATED, 2), (DELETED, 3)])
+        self.assertEqual(events.get_events(3), [])
+        self.assertTrue(events.has_events_after(1))
+        self.assertFalse(events.has_events_after(0))
+
+    def test_without_asgi(self):
+        response = self.client.get(self.events_url)
+
+        self.assertEqual(response.status_code, 204)
+
+    async def test_stream(self):
+        response = await self.async_client.get(self.events_url,
+                                               {'status': 2})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+        await sync_to_async(self.change_tasks)()
+        messages = (await anext(stream)).decode().split('\n\n')
+        await stream.aclose()
+
+        self.assertIn('event: task', messages[0])
+        self.assertIn('Find the rebels base', messages[0])
+        self.assertIn(f'id: {broker.format_id(broker.last_id)}', messages[1])
+        self.assertIn('event: remove\ndata: {"id": 1}', messages[1])
+
+    async def test_reload_after_missed_events(self):
+        broker.publish(UPDATED, range(broker.events.maxlen + 1))
+
+        response = await self.async_client.get(
+            self.events_url, headers={'Last-Event-ID': broker.format_id(0)}
+        )
+        chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertIn(b'event: reload', chunks[-1])
+
+    async def test_reload_after_unknown_event_id(self):
+        broker.publish(UPDATED, [1])
+        # Ids of another process, of a later event, or without a token
+        for last_event_id in ('0123456789ab-1',
+                              broker.format_id(broker.last_id + 1), '1'):
+            response = await self.async_client.get(
+                self.events_url, headers={'Last-Event-ID': last_event_id}
+            )
+            chunks = [chunk async for chunk in response.streaming_content]
+
+            self.assertIn(b'event: reload', chunks[-1])
+
+    async def test_stream_starts_after_rendered_event_id(self):
+        response = await self.async_client.get(reverse_lazy('tasks_list'))
+        events_query = response.context['events_query']
+        self.assertIn(f'last_event_id={broker.format_id(broker.last_id)}',
+                      events_query)
+        # Changed before the page opened its stream
+        await sync_to_async(self.change_tasks)()
+
+        response = await self.async_client.get(f'{self.events_url}?'
+                                               f'{events_query}')
+        stream = response.streaming_content
+        await anext(stream)
+        messages = (await anext(stream)).decode()
+        await stream.aclose()
+
+        self.assertIn('Find the rebels base', messages)
+
+    async def test_shared_results_drop_failures(self):
+        results = SharedResults()
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ObjectDoesNotExist
+            return 'rows'
+
+        with self.assertRaises(ObjectDoesNotExist):
+            await results.get('key', lookup)
+
+        self.assertEqual(await results.get('key', lookup), 'rows')
+        self.assertEqual(await results.get('key', lookup), 'rows')
+        self.assertEqual(len(calls), 2)
+
+    def test_broker_reset(self):
+        events = TaskEventBroker()
+        events.publish(UPDATED, [1])
+        event_id = events.format_id(events.last_id)
+        events.reset()
+
+        self.assertIsNone(events.parse_id(event_id))
+        self.assertEqual(events.get_events(0), [])
+
+    async def test_subscribe_under_asgi_only(self):
+        response = await self.async_client.get(reverse_lazy('tasks_list'))
+        self.assertContains(response, 'new EventSource')
+
+        response = await sync_to_async(self.client.get)(
+            reverse_lazy('tasks_list')
+        )
+        self.assertNotContains(response, 'new EventSource')
+
+    async def test_invalid_filter(self):
+        response = await self.async_client.get(self.events_url,
+                                               {'status': 100})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestTaskStats(TaskTestCase):
+    stats_url = reverse_lazy('tasks_stats')
+
+    def assertStatsCorrect(self):
+        tasks = Task.objects.order_by().values('status', 'executor') \
+            .annotate(count=Count('id'))
+        self.assertEqual(
+            {(stat.status_id, stat.executor_id): stat.count
+             for stat in TaskStat.objects.filter(count__gt=0)},
+            {(row['status'], row['executor']): row['count'] for row in tasks}
+        )
+        labels = TaskLabelRelation.objects.order_by().values('label') \
+            .annotate(count=Count('id'))
+        self.assertEqual(
+            dict(LabelStat.objects.filter(count__gt=0)
+                 .values_list('label', 'count')),
+            {row['label']: row['count'] for row in labels}
+        )
+
+    def test_stats_follow_changes(self):
+        self.assertStatsCorrect()
+        self.create_tasks(10)
+        self.client.post(reverse_lazy('task_create'),
+                         data=self.test_tasks['create'])
+        self.client.post(reverse_lazy('task_update', kwargs={'pk': 1}),
+                         data=self.test_tasks['update'])
+        self.assertStatsCorrect()
+
+        self.task_2.labels.add(self.label_1)
+        self.task_1.labels.remove(self.label_2)
+        self.client.post(reverse_lazy('task_delete', kwargs={'pk': 1}))
+        self.assertStatsCorrect()
+
+    def test_stats_follow_bulk_operations(self):
+        self.create_tasks(10)
+        for data in ({'action': 'set_executor', 'executor': 2, 'filter': {}},
+                     {'action': 'add_labels', 'labels': [3], 'filter': {}},
+                     {'action': 'set_status', 'status': 1, 'tasks': [1, 2]},
+                     {'action': 'delete', 'filter': {'status': 1}}):
+            response = self.client.post(reverse_lazy('api_tasks_bulk'), data,
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertStatsCorrect()
+
+    def test_stats_page(self):
+        self.create_tasks(4)
+        self.client.get(self.stats_url)
+
+        with self.assertNumQueries(TaskStatsView.query_budget):
+            response = self.client.get(self.stats_url)
+
+        self.assertEqual(response.context['total'], Task.objects.count())
+        # task_2 and half of the created ones
+        self.assertEqual(response.context['statuses'][0],
+                         (self.status_2, 3))
+        self.assertEqual(response.context['labels'],
+                         [(self.label_1, 1), (self.label_2, 1)])
+        self.assertContains(response, self.user_1.get_full_name())
@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
 from django.test import TestCase, Client
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
+from task_manager.apps.users.views import UserAutocompleteView
 from task_manager.load_data import from_json
 
 
@@ -13,6 +16,7 @@ class UserTestCase(TestCase):
     test_users = from_json('test_users.json')
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user_1 = get_user_model().objects.get(pk=1)
         self.user_2 = get_user_model().objects.get(pk=2)
@@ -52,6 +56,60 @@ class TestUsersListView(UserTestCase):
         self.assertInHTML(self.user_2.username, page)
         self.assertInHTML(self.user_3.username, page)
 
+    def test_list_tasks_count(self):
+        # The users with their counts
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse_lazy('users_list'))
+        counts = {user.pk: (user.authored_count, user.executed_count)
+                  for user in response.context['users']}
+
+        self.assertEqual(counts, {1: (1, 1), 2: (0, 0), 3: (1, 1)})
+
+
+class TestUserAutocompleteView(UserTestCase):
+    url = reverse_lazy('users_autocomplete')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user_1)
+
+    def test_autocomplete(self):
+        response = self.client.get(self.url, {'q': 'sky'})
+
+        self.assertEqual(response.json(), {'results': [
+            {'id': 1, 'text': 'Anakin Skywalker'},
+            {'id': 3, 'text': 'Luke Skywalker'},
+        ]})
+        response = self.client.get(self.url, {'q': 'PRIN'})
+        self.assertEqual(response.json()['results'],
+                         [{'id': 2, 'text': 'Leia Organa'}])
+
+    def test_autocomplete_limit(self):
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user{number}')
+            for number in range(UserAutocompleteView.limit + 1)
+        )
+        response = self.client.get(self.url, {'q': 'user'})
+
+        self.assertEqual(len(response.json()['results']),
+                         UserAutocompleteView.limit)
+        self.assertEqual(self.client.get(self.url).json(), {'results': []})
+
+    def test_autocomplete_uses_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('the plan is checked on SQLite only')
+        queryset = UserAutocompleteView().get_queryset('sky')
+
+        plan = queryset.explain()
+        for column in UserAutocompleteView.search_fields:
+            self.assertIn(f'user_{column}_prefix_idx', plan)
+
+    def test_autocomplete_if_unauthorized(self):
+        self.client.logout()
+        response = self.client.get(self.url, {'q': 'sky'})
+
+        self.assertRedirects(response, reverse_lazy('login'))
+
 
 class TestUserCreateView(UserTestCase):
 
@@ -126,8 +184,10 @@ class TestUserCreateView(UserTestCase):
 class TestUserUpdateView(UserTestCase):
     def test_update_view(self):
         self.client.force_login(self.user_2)
-        response = self.client.get(reverse_lazy('user_update',
-                                                kwargs={'pk': 2}))
+        # The user and the updated one, loaded once
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse_lazy('user_update',
+                                                    kwargs={'pk': 2}))
 
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, template_name='users/update.html')
@@ -27,4 +27,5 @@ urlpatterns = [
     path('statuses/', include('task_manager.apps.statuses.urls')),
     path('labels/', include('task_manager.apps.labels.urls')),
     path('tasks/', include('task_manager.apps.tasks.urls')),
+    path('api/tasks/', include('task_manager.apps.tasks.api_urls')),
 ]
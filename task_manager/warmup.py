@@ -0,0 +1,110 @@
+"""
+Warm-up of a worker process before its first request.
+
+A cold process compiles every template it renders, the tag libraries they
+load included, fills the URL resolvers and reads the translation catalogs
+in its first requests. warm_up() does all of that at once: the compiled
+templates stay in the cached template loaders, the rest in the module
+caches of Django. Unless DEBUG is on, every server worker warms up once
+it started, after any fork: gunicorn in the post_worker_init hook of
+gunicorn.conf.py, uvicorn at the lifespan startup of task_manager.asgi.
+Management commands importing the application modules do not.
+"""
+import os
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.forms.renderers import get_default_renderer
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+from django.utils import translation
+
+FORM_TEMPLATES = 'django/forms'
+
+
+def get_loaders(engine):
+    """The loaders of a Django template engine, without the cached ones"""
+    for loader in engine.engine.template_loaders:
+        yield from getattr(loader, 'loaders', [loader])
+
+
+def get_template_names(engine, prefix=''):
+    names = set()
+    for loader in get_loaders(engine):
+        for directory in loader.get_dirs():
+            root = Path(directory) / prefix
+            for path, dirs, files in os.walk(root):
+                names.update(
+                    (Path(path) / file).relative_to(directory).as_posix()
+                    for file in files if file.endswith(('.html', '.txt'))
+                )
+    return sorted(names)
+
+
+def compile_templates(engine, prefix=''):
+    """
+    Load the templates through the cached loaders, returns the number of
+    compiled templates and the names of the failed ones.
+    """
+    compiled, failed = 0, []
+    for name in get_template_names(engine, prefix):
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError:
+            # e.g. the templates using the tags of an app not installed
+            failed.append(name)
+        else:
+            compiled += 1
+    return compiled, failed
+
+
+def warm_up():
+    """
+    Compile the templates of the pages and of the form widgets, load the
+    URL resolvers and the translations of every language. Returns the
+    number of compiled templates and the names of the failed ones.
+    """
+    template_engines = [(engine, '') for engine in engines.all()]
+    renderer = get_default_renderer()
+    if hasattr(renderer, 'engine'):
+        template_engines.append((renderer.engine, FORM_TEMPLATES))
+    compiled, failed = 0, []
+    for engine, prefix in template_engines:
+        engine_compiled, engine_failed = compile_templates(engine, prefix)
+        compiled += engine_compiled
+        failed += engine_failed
+
+    resolver = get_resolver()
+    for language, name in settings.LANGUAGES:
+        # Activating a language loads its catalog, the resolver fills the
+        # reverse lookups of the active language
+        with translation.override(language):
+            resolver.reverse_dict
+    return compiled, failed
+
+
+def warm_up_server():
+    """Warm up a server worker, unless DEBUG is on"""
+    if not settings.DEBUG:
+        warm_up()
+
+
+def warm_up_on_startup(application):
+    """
+    Wrap an ASGI application to warm up the worker at the startup of the
+    lifespan protocol, which Django does not handle.
+    """
+    async def lifespan_application(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await sync_to_async(warm_up_server)()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return lifespan_application